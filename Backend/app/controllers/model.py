@@ -1,5 +1,6 @@
 import requests
 import os
+import json
 import re
 import pytesseract as te
 from PIL import Image
@@ -15,6 +16,8 @@ scrape_url = "http://localhost:5050/scrape"
 scrape_content_url = "http://localhost:5050/scrape_content"
 embedding_url = "http://localhost:5050/embedding"
 explanation_url = "http://localhost:5050/explanation"
+lookup_url = "http://localhost:5050/lookup"
+pipeline_url = "http://localhost:5050/pipeline"
 
 
 def reliability_check(min_score, max_score, min_article, max_article):
@@ -39,6 +42,24 @@ def reliability_model(message, user_text, bot,
                       ):
     global keywords, reply_data, results, min_score, max_score, return_data, article_data
 
+    """
+    claim history: a near-identical claim verified recently is answered from its cached verdict
+    """
+    try:
+        response = requests.post(lookup_url, json={"text": user_text})
+        if response.status_code == 200:
+            data = response.json()
+            if data.get("found"):
+                max_score = data.get("highest_score")
+                max_article = data.get("supporting_article")
+                bot.send_message(message.chat.id,
+                                 f"A very similar claim was verified at {data.get('verified_at')}:\n"
+                                 f"\"{data.get('matched_claim')}\"\n\nhighest score is: {max_score}")
+                bot.reply_to(message, reliability_check(max_score, max_score, max_article, max_article))
+                return None
+    except Exception as e:
+        print(f"Claim lookup failed, running full check: {e}")
+
     payload = {"text": user_text,
                "redundancy_threshold": redundancy_threshold
                # how many keywords are required to simplify keyword searches; default 15
@@ -53,90 +74,73 @@ def reliability_model(message, user_text, bot,
         bot.send_message(message.chat.id,f"Error: {e}")
 
     """
-    scraper 
-    {"results": list of data in json format}
-    is the json format 
+    pipeline: searching, content extraction and scoring overlap on the server.
+    events arrive as JSON lines: source, search_done, article, result
     """
 
     bot.send_message(message.chat.id, "Finding Sources...")
     payload2 = {"keywords": keywords,
                 "original_query": user_text,
+                "input_text": user_text,
                 "max_search_count": max_search_count,
                 "min_source_count": min_source_count,
                 "keyword_query_percentage": keyword_query_percentage,
                 "max_sites_in_query": max_sites_in_query,
-                "is_singapore_sources": is_singapore_sources
+                "is_singapore_sources": is_singapore_sources,
+                "stream": True
                 }
 
+    results = []
+    data = None
     try:
         bot.send_chat_action(message.chat.id, "typing")
-        response = requests.post(scrape_url, json=payload2)
-
-        if response.status_code == 200:
-            data = response.json()
-
-            results = data.get("results", "N/A")
-            print(f"here:: {results}")
-            return_data = ""
-            count = 0
-            for result in results:
-                if count == 5: break
-                if len(return_data) < 3000:
-                    title = result.get("title", "")
-                    url = result.get("url", "")
-                    if url.endswith(".xml"):
-                        continue
-                    return_data += f"{title}\nlink: {url}\n\n\n"
-                count += 1
-
-        else:
-            return_data = "Error verifying. Server responded with an error."
+        with requests.post(pipeline_url, json=payload2, stream=True) as response:
+            if response.status_code != 200:
+                bot.send_message(message.chat.id, "Error verifying. Server responded with an error.")
+                return None
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+
+                if event["event"] == "source":
+                    results.append(event)
+
+                elif event["event"] == "search_done":
+                    print(f"here:: {results}")
+                    return_data = ""
+                    count = 0
+                    for result in results:
+                        if count == 5: break
+                        if len(return_data) < 3000:
+                            title = result.get("title", "")
+                            url = result.get("url", "")
+                            if url.endswith(".xml"):
+                                continue
+                            return_data += f"{title}\nlink: {url}\n\n\n"
+                        count += 1
+
+                    if return_data == "":
+                        bot.send_message(message.chat.id, "No relevant credible Sources could be found. This is likely a fake news.")
+                        return None
+                    bot.send_message(message.chat.id, return_data)
+                    bot.send_message(message.chat.id, "extracting and analysing content of sources...")
+                    bot.send_chat_action(message.chat.id, "typing")
+
+                elif event["event"] == "result":
+                    data = event
     except Exception as e:
-        reply_data = f"Error: {e}"
-
-    if return_data == "":
-        bot.send_message(message.chat.id, "No relevant credible Sources could be found. This is likely a fake news.")
+        bot.send_message(message.chat.id, f"Error: {e}")
         return None
-    bot.send_message(message.chat.id, return_data)
-    bot.send_message(message.chat.id, "extracting content of sources...")
-
-    """
-    content Scraper
-    """
 
-    payload3 = {"results": results}
-
-
-    try:
-        bot.send_chat_action(message.chat.id, "typing")
-        response = requests.post(scrape_content_url, json=payload3)
-        if response.status_code == 200:
-            data = response.json()
-            results = data.get("results", "N/A")
-            article_data = results
-        else:
-            reply_msg = "Error scraping. Server responded with an error."
-    except Exception as e:
-        reply_data = f"Error: {e}"
-
-    bot.send_message(message.chat.id, "finished extracting articles content...")
-
-    """
-    now embedding:
-
-    """
+    if data is None:
+        bot.send_message(message.chat.id, "Error verifying. Server responded with an error.")
+        return None
 
-    bot.send_message(message.chat.id, "analysing content...")
-    payload4 = {"input_text": user_text,
-                "article_info": results}
     try:
-        bot.send_chat_action(message.chat.id, "typing")
-        response = requests.post(embedding_url, json=payload4)
-        data = response.json()
-
-        results = data.get("results", "N/A")  # all articles info
+        article_data = data.get("results", [])  # all articles info
 
-        input_vector = data.get("input_vector", "N/A")
         average_score = data.get("average_score", "N/A")
         max_score = data.get("highest_score", "N/A")
         min_score = data.get("lowest_score", "N/A")
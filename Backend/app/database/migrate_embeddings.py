@@ -0,0 +1,82 @@
+"""
+Converts QueryData.input_embedding from JSON text to binary vectors in bulk.
+
+Run from the Backend directory:
+
+    python -m app.database.migrate_embeddings --dtype float32 --batch-size 5000
+
+Rows are read in primary-key order and rewritten one batch per transaction,
+so the migration can be stopped and re-run; rows already in the binary
+format are skipped.
+"""
+import argparse
+
+from app.database.pool import get_pool
+from app.database.vector_codec import encode_vector, is_encoded, load_embedding
+
+
+def migrate(conn, dtype="float32", batch_size=5000, key_column="id", alter_column=True, sql=lambda q: q):
+    """Rewrites every JSON embedding in QueryData as a binary vector. Returns the number converted."""
+    cursor = conn.cursor()
+    if alter_column:
+        # TEXT -> LONGBLOB keeps the JSON bytes, so unconverted rows stay readable
+        cursor.execute("ALTER TABLE QueryData MODIFY input_embedding LONGBLOB")
+        conn.commit()
+
+    converted = 0
+    last_key = None
+    while True:
+        if last_key is None:
+            cursor.execute(
+                sql(f"SELECT {key_column}, input_embedding FROM QueryData ORDER BY {key_column} LIMIT %s"),
+                (batch_size,)
+            )
+        else:
+            cursor.execute(
+                sql(f"SELECT {key_column}, input_embedding FROM QueryData "
+                    f"WHERE {key_column} > %s ORDER BY {key_column} LIMIT %s"),
+                (last_key, batch_size)
+            )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_key = rows[-1][0]
+
+        updates = []
+        for key, value in rows:
+            if value is None or is_encoded(value):
+                continue
+            try:
+                updates.append((encode_vector(load_embedding(value), dtype), key))
+            except ValueError as e:
+                print(f"Skipping row {key}: {e}")
+
+        if updates:
+            cursor.executemany(
+                sql(f"UPDATE QueryData SET input_embedding = %s WHERE {key_column} = %s"), updates
+            )
+            conn.commit()
+            converted += len(updates)
+        print(f"Converted {converted} rows (up to {key_column}={last_key})")
+
+    cursor.close()
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert QueryData embeddings from JSON to binary")
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16", "int8"])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--key-column", default="id", help="primary key of QueryData")
+    parser.add_argument("--no-alter", action="store_true", help="column is already a BLOB type")
+    args = parser.parse_args()
+
+    pool = get_pool()
+    # sqlite has no MODIFY COLUMN and its BLOB-typed column needs no change
+    alter = not args.no_alter and pool.backend == "mysql"
+    try:
+        with pool.connection() as conn:
+            total = migrate(conn, args.dtype, args.batch_size, args.key_column, alter, pool.sql)
+        print(f"Done: {total} embeddings converted")
+    except pool.errors as e:
+        print(f"Migration stopped: {e}")
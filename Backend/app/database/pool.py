@@ -0,0 +1,180 @@
+"""
+Connection pool shared by every request thread in the process.
+
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        ...
+
+Connections are checked out for the duration of the with block and returned
+afterwards. Connections idle for longer than DB_HEALTHCHECK_SECONDS are
+pinged before use and replaced if they died; a connection that raised a
+database error is discarded instead of going back to the pool, and every
+returned connection is rolled back first, so work not committed inside the
+block is dropped rather than leaking its transaction to the next borrower.
+Waiting for a free connection is bounded by DB_POOL_TIMEOUT.
+
+The "sqlite" backend runs the same code locally and in tests. Queries are
+written with %s placeholders and translated for sqlite by sql().
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from app.utils.config import (
+    DB_BACKEND, DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME, SQLITE_PATH,
+    DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_HEALTHCHECK_SECONDS
+)
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS QueryData (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        input TEXT,
+        sim_score REAL,
+        source_url TEXT,
+        input_embedding BLOB,
+        date_minute TEXT
+    )
+"""
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's wait limit."""
+
+
+class ConnectionPool:
+    def __init__(self, backend=DB_BACKEND, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 healthcheck_seconds=DB_HEALTHCHECK_SECONDS):
+        if backend not in ("mysql", "sqlite"):
+            raise ValueError(f"Unknown database backend '{backend}'")
+        self.backend = backend
+        self.size = size
+        self.timeout = timeout
+        self.healthcheck_seconds = healthcheck_seconds
+        self._idle = []  # (connection, last_used); most recently used last
+        self._created = 0
+        # Guards _idle and _created; waiters wake when a connection is released or a slot frees up
+        self._available = threading.Condition()
+
+        if backend == "mysql":
+            import pymysql
+            self.errors = (pymysql.MySQLError,)
+        else:
+            self.errors = (sqlite3.Error,)
+
+    def sql(self, query):
+        """Translates a %s-placeholder query to the backend's parameter style."""
+        return query.replace("%s", "?") if self.backend == "sqlite" else query
+
+    def _connect(self):
+        if self.backend == "mysql":
+            import pymysql
+            return pymysql.connect(host=DB_HOST, port=DB_PORT, user=DB_USER,
+                                   password=DB_PASSWORD, database=DB_NAME)
+
+        os.makedirs(os.path.dirname(SQLITE_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(SQLITE_PATH, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SQLITE_SCHEMA)
+        conn.commit()
+        return conn
+
+    def _is_alive(self, conn):
+        try:
+            if self.backend == "mysql":
+                conn.ping(reconnect=True)
+            else:
+                conn.execute("SELECT 1")
+            return True
+        except self.errors:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except self.errors:
+            pass
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _release(self, conn):
+        with self._available:
+            self._idle.append((conn, time.monotonic()))
+            self._available.notify()
+
+    def _acquire(self):
+        """An idle connection, a new one if the pool has room, or PoolTimeout after waiting self.timeout."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._available:
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No database connection free after {self.timeout}s")
+                    self._available.wait(remaining)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    conn, last_used = None, None
+                    self._created += 1
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._available:
+                        self._created -= 1
+                        self._available.notify()
+                    raise
+            if time.monotonic() - last_used < self.healthcheck_seconds or self._is_alive(conn):
+                return conn
+            # Dead connection: drop it and try again (a new one can be created in its place)
+            print("Dropping dead database connection")
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Checks a connection out of the pool for the duration of the with block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        except self.errors:
+            # The connection may be in a broken state; reconnect next time instead of reusing it
+            self._discard(conn)
+            raise
+        except BaseException:
+            try:
+                conn.rollback()
+            except self.errors:
+                self._discard(conn)
+                raise
+            self._release(conn)
+            raise
+        else:
+            # End any transaction the block left open (a SELECT without commit) so the
+            # next borrower does not inherit its snapshot or locks
+            try:
+                conn.rollback()
+            except self.errors:
+                self._discard(conn)
+                return
+            self._release(conn)
+
+    def stats(self):
+        """Open and idle connection counts."""
+        return {"backend": self.backend, "size": self.size, "open": self._created, "idle": len(self._idle)}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Returns the process-wide pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
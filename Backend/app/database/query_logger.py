@@ -0,0 +1,130 @@
+"""
+Write-behind logging of verified queries to QueryData.
+
+Request threads call query_logger.log(...), which only puts the row on a
+bounded in-memory queue. A background thread drains the queue and writes the
+rows with one multi-row INSERT every QUERY_LOG_BATCH_SIZE rows or
+QUERY_LOG_FLUSH_MS milliseconds, whichever comes first, so the request path
+never waits on the database.
+
+When the queue is full, QUERY_LOG_FULL_POLICY decides what happens: "drop"
+discards the new row (counted in stats), "block" waits up to
+QUERY_LOG_BLOCK_TIMEOUT seconds for room before dropping. Queued rows are
+flushed at interpreter exit.
+"""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+
+from app.database.sql import DatabaseAccess
+from app.utils.config import (
+    QUERY_LOG_BATCH_SIZE, QUERY_LOG_FLUSH_MS, QUERY_LOG_QUEUE_SIZE,
+    QUERY_LOG_FULL_POLICY, QUERY_LOG_BLOCK_TIMEOUT
+)
+
+_STOP = object()
+
+
+class QueryLogWriter:
+    def __init__(self, batch_size=QUERY_LOG_BATCH_SIZE, flush_ms=QUERY_LOG_FLUSH_MS,
+                 max_queue=QUERY_LOG_QUEUE_SIZE, full_policy=QUERY_LOG_FULL_POLICY,
+                 block_timeout=QUERY_LOG_BLOCK_TIMEOUT, db=None):
+        if full_policy not in ("drop", "block"):
+            raise ValueError(f"Unknown query log full policy '{full_policy}'")
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+        self._db = db
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._exit_registered = False
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def _start(self):
+        """Starts the writer thread, or a new one if the previous thread died."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    print("Query log writer thread died, restarting it")
+                self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+                self._thread.start()
+                if not self._exit_registered:
+                    atexit.register(self.shutdown)
+                    self._exit_registered = True
+
+    def log(self, input_text, sim_score, source_url, input_embedding, logged_at=None):
+        """Queues one QueryData row. Returns False if the row was dropped."""
+        self._start()
+        logged_at = (logged_at or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+        row = (input_text, sim_score, source_url, input_embedding, logged_at)
+        try:
+            if self.full_policy == "block":
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            print("Query log queue full, dropping row")
+            return False
+        with self._lock:
+            self._stats["queued"] += 1
+        return True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, rows):
+        if not rows:
+            return
+        try:
+            if self._db is None:
+                self._db = DatabaseAccess()
+            ok = self._db.insert_many(rows)
+        except Exception as e:
+            # Anything escaping here would end the writer thread and strand the queue
+            print(f"Query log flush failed: {e}")
+            ok = False
+        with self._lock:
+            self._stats["written" if ok else "failed"] += len(rows)
+            self._stats["batches"] += 1
+
+    def shutdown(self, timeout=10):
+        """Flushes everything queued so far and stops the writer thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def get_stats(self):
+        """Row counters plus the current queue depth."""
+        with self._lock:
+            return {**self._stats, "pending": self._queue.qsize(), "policy": self.full_policy}
+
+
+query_logger = QueryLogWriter()
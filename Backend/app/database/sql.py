@@ -1,58 +1,171 @@
 import json
-
-import pymysql
+import threading
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
-model1 = SentenceTransformer("all-MiniLM-L12-v2")
+
+import numpy as np
+
+from app.database.pool import get_pool, PoolTimeout
+from app.database.vector_codec import encode_vector, load_embedding
+from app.utils.config import QUERY_EMBEDDING_DTYPE
+
+BINARY_COLUMN_TYPES = ("blob", "mediumblob", "longblob", "varbinary", "binary")
+
+# Whether input_embedding holds binary vectors, checked once per process and backend
+_binary_embeddings = {}
+_binary_embeddings_lock = threading.Lock()
+
+
 class DatabaseAccess:
-    def __init__(self):
-        try:
-            self.conn = pymysql.connect(
-                host="localhost",
-                port=3306,
-                user="root",
-                password="Borahe13",
-                database="VERIFAI"
-            )
-            self.cursor = self.conn.cursor()
-        except pymysql.MySQLError as e:
-            print(f"Error connecting to database: {e}")
+    """QueryData access through the process-wide connection pool (see pool.py)."""
+
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
 
     def insert_data(self,  input_text, sim_score, source_url,input_embedding):
-        """Insert data into QueryData table"""
+        """Insert data into QueryData table; input_embedding comes from encode_embedding"""
+        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # Format datetime
+        if self.insert_many([(input_text, sim_score, source_url, input_embedding, current_time)]):
+            print("Data inserted successfully!")
+
+    def insert_many(self, rows):
+        """
+        Insert (input, sim_score, source_url, input_embedding, date_minute) rows into QueryData
+        with one multi-row INSERT and a single commit. Returns True on success.
+        """
+        if not rows:
+            return True
         try:
-            query = """
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+            query = f"""
                 INSERT INTO QueryData (input, sim_score, source_url, input_embedding, date_minute)
-                VALUES (%s, %s, %s, %s, %s)
+                VALUES {placeholders}
             """
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # Format datetime
+            params = []
+            for input_text, sim_score, source_url, input_embedding, date_minute in rows:
+                params.extend([input_text, float(sim_score), source_url, input_embedding, date_minute])
 
-            self.cursor.execute(query, (input_text, sim_score, source_url, input_embedding, current_time))
-            self.conn.commit()
-            print("Data inserted successfully!")
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self.pool.sql(query), params)
+                conn.commit()
+                cursor.close()
+            return True
 
-        except pymysql.MySQLError as e:
+        except self.pool.errors + (PoolTimeout,) as e:
             print(f"Database error: {e}")
+            return False
+
+    def fetch_recent_queries(self, since):
+        """Fetch QueryData rows logged at or after since (a datetime), oldest first"""
+        try:
+            query = """
+                SELECT input, sim_score, source_url, input_embedding, date_minute
+                FROM QueryData
+                WHERE date_minute >= %s
+                ORDER BY date_minute
+            """
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self.pool.sql(query), (since.strftime('%Y-%m-%d %H:%M:%S'),))
+                rows = cursor.fetchall()
+                cursor.close()
+            return rows
+
+        except self.pool.errors + (PoolTimeout,) as e:
+            print(f"Database error: {e}")
+            return []
+
+    def iter_queries(self, since, batch_size=10000, key_column="id"):
+        """
+        Yields QueryData rows logged at or after since in batches of batch_size,
+        paging by primary key so a large table is never held in memory at once.
+        Unlike the fetch_ helpers it raises database errors, so a caller never
+        mistakes a partial read for the whole table.
+        """
+        query = f"""
+            SELECT {key_column}, input, sim_score, source_url, input_embedding, date_minute
+            FROM QueryData
+            WHERE date_minute >= %s AND {key_column} > %s
+            ORDER BY {key_column}
+            LIMIT %s
+        """
+        last_key = 0
+        while True:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self.pool.sql(query), (since.strftime('%Y-%m-%d %H:%M:%S'), last_key, batch_size))
+                rows = cursor.fetchall()
+                cursor.close()
+            if not rows:
+                return
+            last_key = rows[-1][0]
+            yield [row[1:] for row in rows]
+            if len(rows) < batch_size:
+                return
+
+    def fetch_embeddings(self, since):
+        """
+        Fetch QueryData embeddings logged at or after since, oldest first. Binary
+        rows come back as read-only np.frombuffer views on the fetched bytes (no
+        copy); legacy JSON rows are parsed. np.vstack them if one matrix is needed.
+        """
+        return [load_embedding(row[3]) for row in self.fetch_recent_queries(since)]
+
+    def binary_embeddings(self):
+        """
+        True if QueryData.input_embedding can hold binary vectors: always on sqlite,
+        and on MySQL once migrate_embeddings changed the column to a BLOB type.
+        Checked on the first call in each process (create_app makes that call).
+        """
+        with _binary_embeddings_lock:
+            if self.pool.backend not in _binary_embeddings:
+                _binary_embeddings[self.pool.backend] = self._column_is_binary()
+            return _binary_embeddings[self.pool.backend]
+
+    def _column_is_binary(self):
+        if self.pool.backend == "sqlite":
+            return True  # sqlite stores bytes as BLOB values whatever the declared type
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'QueryData' AND COLUMN_NAME = 'input_embedding'"
+                )
+                row = cursor.fetchone()
+                cursor.close()
+        except self.pool.errors + (PoolTimeout,) as e:
+            print(f"Database error: {e}; writing embeddings as JSON text")
+            return False
+        binary = bool(row) and row[0].lower() in BINARY_COLUMN_TYPES
+        if not binary:
+            print("QueryData.input_embedding is not a BLOB column yet; writing embeddings as JSON text "
+                  "until app.database.migrate_embeddings has run")
+        return binary
+
+    def encode_embedding(self, vector, dtype=QUERY_EMBEDDING_DTYPE):
+        """The stored form of a claim vector: binary (see vector_codec) if the column allows it, else JSON text."""
+        if self.binary_embeddings():
+            return encode_vector(vector, dtype)
+        return json.dumps(np.asarray(vector, dtype=np.float32).tolist())
 
     def close_connection(self):
-        """Close the database connection"""
-        self.cursor.close()
-        self.conn.close()
+        """Connections belong to the pool and are returned after every query; nothing to close"""
 
 
 # Usage Example
 if __name__ == "__main__":
-    db = DatabaseAccess()
-    input_embedding = model1.encode("Example query input", convert_to_numpy=True)
+    from app.utils.model_registry import get_model
 
-# Convert NumPy array to list
+    db = DatabaseAccess()
+    input_embedding = get_model("all-MiniLM-L12-v2").encode("Example query input", convert_to_numpy=True)
 
-# Convert to JSON
-    embedding_json = json.dumps(embedding_list)
+# Pack the NumPy array into a BLOB (JSON text on an unmigrated column)
+    embedding_blob = db.encode_embedding(input_embedding)
     db.insert_data(
         input_text="Example query input",
         sim_score=0.85,
         source_url="https://example.com",
-        input_embedding=embedding_json
+        input_embedding=embedding_blob
     )
     db.close_connection()
@@ -0,0 +1,73 @@
+"""
+Binary encoding of embedding vectors for QueryData.input_embedding.
+
+Layout (little endian, 16-byte header followed by the raw values):
+    4s  magic b"DEV1"
+    B   dtype code (1 = float32, 2 = float16, 3 = int8 quantized)
+    3x  padding
+    I   dimension
+    f   scale (int8 only: value = int8 * scale; 1.0 otherwise)
+
+A 384-dim float32 vector takes 1552 bytes instead of ~8 KB of JSON text, and
+decoding float32/float16 is a zero-copy np.frombuffer view.
+
+Binary vectors need a BLOB column: on MySQL, run migrate_embeddings first.
+Until then DatabaseAccess.encode_embedding keeps writing JSON text.
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"DEV1"
+HEADER = struct.Struct("<4sB3xIf")
+
+DTYPE_CODES = {"float32": 1, "float16": 2, "int8": 3}
+CODE_DTYPES = {code: np.dtype(name) for name, code in DTYPE_CODES.items()}
+
+
+def encode_vector(vector, dtype="float32"):
+    """Packs a 1-d vector into the binary format, optionally as float16 or int8."""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    scale = 1.0
+    if dtype == "int8":
+        # Symmetric quantization: the largest magnitude maps to 127
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        values = np.clip(np.round(vector / scale), -127, 127).astype(np.int8)
+    else:
+        values = vector.astype(CODE_DTYPES[DTYPE_CODES[dtype]])
+    return HEADER.pack(MAGIC, DTYPE_CODES[dtype], len(vector), scale) + values.tobytes()
+
+
+def is_encoded(value):
+    """True if value is a binary vector rather than legacy JSON text."""
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:4]) == MAGIC
+
+
+def read_header(blob):
+    """Returns (dtype, dim, scale) of an encoded vector."""
+    magic, code, dim, scale = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Not a binary embedding")
+    return CODE_DTYPES[code], dim, scale
+
+
+def decode_vector(blob):
+    """
+    Returns the vector stored in blob. float32 and float16 vectors are read-only
+    views on the blob (no copy); int8 vectors are dequantized to float32.
+    """
+    dtype, dim, scale = read_header(blob)
+    values = np.frombuffer(blob, dtype=dtype, count=dim, offset=HEADER.size)
+    if dtype == np.int8:
+        return values.astype(np.float32) * scale
+    return values
+
+
+def load_embedding(value):
+    """Decodes a stored embedding in either the binary format or legacy JSON text."""
+    if is_encoded(value):
+        return decode_vector(bytes(value) if isinstance(value, memoryview) else value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value).decode("utf-8")
+    return np.asarray(json.loads(value), dtype=np.float32)
@@ -0,0 +1,384 @@
+"""
+On-disk approximate nearest neighbour index for claim embeddings.
+
+Vectors, ids and timestamps live in memory-mapped files, so searching never
+turns the history into Python objects and the OS page cache is shared by
+every worker process that opens the same directory. Metadata (claim text,
+score, source) sits in a sqlite file and is only read for the hits.
+
+Search is IVF (inverted file) in plain NumPy: compaction clusters the rows
+with spherical k-means and stores them grouped by cluster, so a query only
+scans the nprobe closest clusters plus the rows inserted since the last
+compaction. Small indexes (below IVF_MIN_ROWS) are scanned flat.
+
+Layout of an index directory:
+    config.json     dim and storage dtype
+    header.i64      count, capacity, compacted rows, version
+    vectors.bin     (capacity, dim) normalized vectors, float32 or float16
+    ids.i64         stable row ids (keys of meta.sqlite3)
+    times.f64       unix timestamps
+    centroids.npy   IVF centroids, offsets.npy start row of each cluster
+    meta.sqlite3    per-id metadata
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in one process are serialized
+    fcntl = None
+
+COUNT, CAPACITY, COMPACTED, VERSION = range(4)
+IVF_MIN_ROWS = 20000  # below this, a flat scan is as fast as probing clusters
+SCAN_CHUNK = 65536  # rows per matrix product when scanning
+
+# Memory maps and IVF arrays of one index version, swapped as a whole so searches never mix versions
+Snapshot = namedtuple("Snapshot", "version capacity vectors ids times centroids offsets")
+
+
+def _spherical_kmeans(vectors, n_clusters, iterations=10, seed=0):
+    """Clusters normalized vectors by cosine similarity; returns normalized centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Clusters that lost all their members keep their previous centroid
+        centroids = np.where(empty[:, None], centroids, sums / np.where(norms == 0, 1, norms))
+    return centroids.astype(np.float32)
+
+
+class VectorIndex:
+    def __init__(self, path, dim, dtype="float32", nprobe=8):
+        self.path = path
+        self.nprobe = nprobe
+        os.makedirs(path, exist_ok=True)
+
+        config_path = os.path.join(path, "config.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                config = json.load(f)
+            if config["dim"] != dim:
+                raise ValueError(f"Index at {path} has dim {config['dim']}, expected {dim}")
+            dtype = config["dtype"]
+        else:
+            with open(config_path, "w") as f:
+                json.dump({"dim": dim, "dtype": dtype}, f)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+
+        self._thread_lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._lock_path = os.path.join(path, ".lock")
+        self._header = None
+        self._snapshot = None
+
+        with self._write_lock():
+            header_path = os.path.join(path, "header.i64")
+            if not os.path.exists(header_path):
+                np.zeros(4, dtype=np.int64).tofile(header_path)
+            self._header = np.memmap(header_path, dtype=np.int64, mode="r+", shape=(4,))
+            with self._meta() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)"
+                )
+        self._sync()
+
+    # --- files and locking -------------------------------------------------
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _meta(self):
+        """Short-lived connection to the metadata store, committed and closed on exit."""
+        conn = sqlite3.connect(self._file("meta.sqlite3"), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    class _Lock:
+        def __init__(self, index):
+            self.index = index
+
+        def __enter__(self):
+            self.index._thread_lock.acquire()
+            if fcntl is not None:
+                self.handle = open(self.index._lock_path, "a")
+                fcntl.flock(self.handle, fcntl.LOCK_EX)
+
+        def __exit__(self, *exc):
+            if fcntl is not None:
+                fcntl.flock(self.handle, fcntl.LOCK_UN)
+                self.handle.close()
+            self.index._thread_lock.release()
+
+    def _write_lock(self):
+        """Serializes writers across threads and, via flock, across processes."""
+        return self._Lock(self)
+
+    def _map(self, name, dtype, shape, capacity):
+        """Memory-maps a data file, growing it to hold capacity rows."""
+        path = self._file(name)
+        row_bytes = np.dtype(dtype).itemsize * (shape[1] if len(shape) > 1 else 1)
+        needed = max(capacity, 1) * row_bytes
+        if not os.path.exists(path) or os.path.getsize(path) < needed:
+            with open(path, "ab") as f:
+                f.truncate(needed)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=(max(capacity, 1),) + tuple(shape[1:]))
+
+    def _sync(self):
+        """
+        Returns the current snapshot, re-mapping the data files first if this or
+        another process grew or compacted the index. The new snapshot is built
+        completely before it replaces the old one.
+        """
+        with self._snapshot_lock:
+            capacity = int(self._header[CAPACITY])
+            version = int(self._header[VERSION])
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.capacity == capacity and snapshot.version == version:
+                return snapshot
+            centroids = offsets = None
+            if os.path.exists(self._file("centroids.npy")):
+                try:
+                    centroids = np.load(self._file("centroids.npy"))
+                    offsets = np.load(self._file("offsets.npy"))
+                except (OSError, ValueError):
+                    centroids = offsets = None  # a compaction elsewhere is replacing them; scanned flat this time
+            self._snapshot = Snapshot(
+                version, capacity,
+                self._map("vectors.bin", self.dtype, (capacity, self.dim), capacity),
+                self._map("ids.i64", np.int64, (capacity,), capacity),
+                self._map("times.f64", np.float64, (capacity,), capacity),
+                centroids, offsets,
+            )
+            return self._snapshot
+
+    def _view(self):
+        """A snapshot with the row count and compacted rows that belong to its version."""
+        while True:
+            snapshot = self._sync()
+            count = int(self._header[COUNT])
+            compacted = int(self._header[COMPACTED])
+            if int(self._header[VERSION]) == snapshot.version:
+                count = min(count, snapshot.capacity)
+                return snapshot, count, min(compacted, count)
+
+    def _grow(self, needed):
+        """Doubles the capacity until needed rows fit. Caller holds the write lock."""
+        capacity = max(int(self._header[CAPACITY]), 1024)
+        while capacity < needed:
+            capacity *= 2
+        self._header[CAPACITY] = capacity
+        self._header.flush()
+        self._sync()
+
+    # --- public API --------------------------------------------------------
+
+    def __len__(self):
+        return int(self._header[COUNT])
+
+    def insert(self, vectors, metas, timestamps=None):
+        """
+        Appends vectors (one per row, normalized on the way in) with their metadata dicts.
+        Returns the stable ids assigned to the new rows.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        if timestamps is None:
+            timestamps = [time.time()] * len(vectors)
+
+        with self._write_lock():
+            with self._meta() as conn:
+                ids = [
+                    conn.execute("INSERT INTO meta (data) VALUES (?)", (json.dumps(meta, default=str),)).lastrowid
+                    for meta in metas
+                ]
+            count = int(self._header[COUNT])
+            if count + len(vectors) > int(self._header[CAPACITY]):
+                self._grow(count + len(vectors))
+            snapshot = self._sync()
+
+            end = count + len(vectors)
+            snapshot.vectors[count:end] = vectors.astype(self.dtype)
+            snapshot.ids[count:end] = ids
+            snapshot.times[count:end] = timestamps
+            # The count is published last so readers never see half-written rows
+            self._header[COUNT] = end
+            self._header.flush()
+        return ids
+
+    def _candidate_ranges(self, snapshot, count, compacted, query):
+        """Row ranges to scan: the nprobe closest IVF clusters plus the uncompacted tail."""
+        if snapshot.centroids is None or not len(snapshot.centroids):
+            return [(0, count)]
+
+        probes = np.argsort(snapshot.centroids @ query)[::-1][:self.nprobe]
+        ranges = [(int(snapshot.offsets[p]), min(int(snapshot.offsets[p + 1]), compacted)) for p in probes]
+        ranges.append((compacted, count))
+        return [(start, end) for start, end in ranges if end > start]
+
+    def search(self, query, k=1, threshold=None, min_timestamp=None):
+        """
+        Top-k rows by cosine similarity to query, optionally only rows at or above
+        threshold and newer than min_timestamp (unix time).
+        Returns a list of dicts: the stored metadata plus "id" and "similarity".
+        """
+        # Everything below reads this one snapshot, whatever compaction does meanwhile
+        snapshot, count, compacted = self._view()
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        best_sims = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        for start, end in self._candidate_ranges(snapshot, count, compacted, query):
+            for chunk_start in range(start, end, SCAN_CHUNK):
+                chunk_end = min(chunk_start + SCAN_CHUNK, end)
+                sims = np.asarray(snapshot.vectors[chunk_start:chunk_end], dtype=np.float32) @ query
+                if min_timestamp is not None:
+                    sims = np.where(snapshot.times[chunk_start:chunk_end] >= min_timestamp, sims, -np.inf)
+                if threshold is not None:
+                    sims = np.where(sims >= threshold, sims, -np.inf)
+                rows = np.arange(chunk_start, chunk_end)
+                if len(sims) > k:
+                    top = np.argpartition(sims, -k)[-k:]
+                    sims, rows = sims[top], rows[top]
+                best_sims = np.concatenate([best_sims, sims])
+                best_rows = np.concatenate([best_rows, rows])
+
+        order = np.argsort(best_sims)[::-1][:k]
+        hits = [(int(best_rows[i]), float(best_sims[i])) for i in order if np.isfinite(best_sims[i])]
+        if not hits:
+            return []
+
+        ids = [int(snapshot.ids[row]) for row, _sim in hits]
+        with self._meta() as conn:
+            placeholders = ",".join("?" * len(ids))
+            stored = dict(conn.execute(f"SELECT id, data FROM meta WHERE id IN ({placeholders})", ids).fetchall())
+        return [
+            dict(json.loads(stored.get(row_id, "{}")), id=row_id, similarity=sim)
+            for row_id, (_row, sim) in zip(ids, hits)
+        ]
+
+    def metas_since(self, min_timestamp):
+        """Stored metadata of the rows stamped at or after min_timestamp (unix time)."""
+        snapshot, count, _compacted = self._view()
+        rows = np.flatnonzero(np.asarray(snapshot.times[:count]) >= min_timestamp)
+        ids = [int(row_id) for row_id in snapshot.ids[rows]]
+        metas = []
+        with self._meta() as conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                metas.extend(json.loads(data) for (data,) in
+                             conn.execute(f"SELECT data FROM meta WHERE id IN ({placeholders})", chunk))
+        return metas
+
+    def tail_size(self):
+        """Rows inserted since the last compaction (scanned flat on every search)."""
+        return len(self) - int(self._header[COMPACTED])
+
+    def compact(self, min_timestamp=None, n_clusters=None):
+        """
+        Drops rows older than min_timestamp, re-clusters the rest and rewrites the
+        files grouped by cluster so searches only touch the probed clusters.
+
+        The clustering and the rewrite work from a snapshot without the write
+        lock, so inserts carry on meanwhile. The lock is only taken at the end,
+        to append the rows inserted since the snapshot and swap the new files in.
+        Returns False if another compaction got there first and nothing changed.
+        """
+        snapshot, count, _compacted = self._view()
+        times = np.array(snapshot.times[:count])
+        live = np.flatnonzero(times >= min_timestamp) if min_timestamp is not None else np.arange(count)
+        n = len(live)
+
+        centroids = None
+        order = live
+        offsets = None
+        if n >= IVF_MIN_ROWS:
+            n_clusters = n_clusters or int(np.sqrt(n))
+            rng = np.random.default_rng(0)
+            sample = live[np.sort(rng.choice(n, min(n, n_clusters * 64), replace=False))]
+            centroids = _spherical_kmeans(np.asarray(snapshot.vectors[sample], dtype=np.float32), n_clusters)
+
+            assignments = np.empty(n, dtype=np.int64)
+            for start in range(0, n, SCAN_CHUNK):
+                chunk = np.asarray(snapshot.vectors[live[start:start + SCAN_CHUNK]], dtype=np.float32)
+                assignments[start:start + SCAN_CHUNK] = np.argmax(chunk @ centroids.T, axis=1)
+            by_cluster = np.argsort(assignments, kind="stable")
+            order = live[by_cluster]
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_clusters))])
+
+        # Per-process names: two workers compacting at once never write into each other's files
+        suffix = f".{os.getpid()}.tmp"
+        columns = [("vectors.bin", "vectors", self.dtype, (None, self.dim)),
+                   ("ids.i64", "ids", np.int64, (None,)),
+                   ("times.f64", "times", np.float64, (None,))]
+        capacity = max(1024, 2 * n)  # room for the rows inserted while this runs
+        for name, field, dtype, shape in columns:
+            out = self._map(name + suffix, dtype, (capacity,) + shape[1:], capacity)
+            source = getattr(snapshot, field)
+            for start in range(0, n, SCAN_CHUNK):
+                rows = order[start:start + SCAN_CHUNK]
+                out[start:start + len(rows)] = source[rows]
+            out.flush()
+            del out
+        dropped = np.setdiff1d(np.array(snapshot.ids[:count]), np.array(snapshot.ids[live]))
+
+        with self._write_lock():
+            if int(self._header[VERSION]) != snapshot.version:
+                # Another process compacted meanwhile; its files already hold our rows
+                for name, _field, _dtype, _shape in columns:
+                    os.remove(self._file(name + suffix))
+                return False
+            current = self._sync()
+            new_count = len(self)
+            total = n + new_count - count
+            while capacity < total:
+                capacity *= 2
+            for name, field, dtype, shape in columns:
+                out = self._map(name + suffix, dtype, (capacity,) + shape[1:], capacity)
+                out[n:total] = getattr(current, field)[count:new_count]
+                out.flush()
+                del out
+                os.replace(self._file(name + suffix), self._file(name))
+            if centroids is not None:
+                # Written aside and renamed, so a concurrent _sync never loads a half-written array
+                for name, array in (("centroids.npy", centroids), ("offsets.npy", offsets)):
+                    with open(self._file(name + suffix), "wb") as f:
+                        np.save(f, array)
+                    os.replace(self._file(name + suffix), self._file(name))
+            else:
+                for name in ("centroids.npy", "offsets.npy"):
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+
+            self._header[COUNT] = total
+            self._header[CAPACITY] = capacity
+            self._header[COMPACTED] = n
+            self._header[VERSION] += 1
+            self._header.flush()
+            self._sync()
+
+        if len(dropped):
+            with self._meta() as conn:
+                conn.executemany("DELETE FROM meta WHERE id = ?", [(int(i),) for i in dropped])
+        print(f"Compacted vector index {self.path}: {n} rows kept, {len(dropped)} dropped, "
+              f"{total - n} added meanwhile, {0 if centroids is None else len(centroids)} clusters")
+        return True
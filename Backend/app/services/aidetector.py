@@ -3,6 +3,7 @@ import os
 import argparse
 from urllib.parse import urlparse
 from dotenv import load_dotenv
+from app.utils.rate_limiter import call_with_backoff
 load_dotenv()
 
 # Your API key from AIORNOT 
@@ -57,7 +58,7 @@ def check_image_url(image_url):
     print(f"Analyzing image from URL: {image_url}")
     
     # Make the API call
-    response = requests.post(endpoint, headers=json_headers, json=payload)
+    response = call_with_backoff("aiornot", requests.post, endpoint, headers=json_headers, json=payload)
     
     # Check if the request was successful
     if response.status_code == 200:
@@ -104,11 +105,11 @@ def check_image_file(file_path):
     try:
         with open(file_path, 'rb') as image_file:
             files = {
-                'object': (os.path.basename(file_path), image_file, mime_type)
+                'object': (os.path.basename(file_path), image_file.read(), mime_type)
             }
             
             # Make the API call
-            response = requests.post(endpoint, headers=form_headers, files=files)
+            response = call_with_backoff("aiornot", requests.post, endpoint, headers=form_headers, files=files)
         
         # Check if the request was successful
         if response.status_code == 200:
@@ -159,11 +160,11 @@ def check_voice_file(file_path):
     try:
         with open(file_path, 'rb') as audio_file:
             files = {
-                'file': (os.path.basename(file_path), audio_file, mime_type)
+                'file': (os.path.basename(file_path), audio_file.read(), mime_type)
             }
             
             # Make the API call (with longer timeout as per docs)
-            response = requests.post(endpoint, headers=form_headers, files=files, timeout=90)
+            response = call_with_backoff("aiornot", requests.post, endpoint, headers=form_headers, files=files, timeout=90)
         
         # Check if the request was successful
         if response.status_code == 200:
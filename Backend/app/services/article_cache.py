@@ -0,0 +1,296 @@
+"""
+HTTP-conditional cache of fetched article pages and their extracted text.
+
+    entry = article_cache.lookup(url)
+    if entry and entry["fresh"]:
+        text = entry["text"]                                  # no request at all
+    headers = article_cache.conditional_headers(entry)        # If-None-Match / If-Modified-Since
+    ...
+    if status == 304:
+        article_cache.revalidated(url, response_headers)      # stored text, no reparse
+    else:
+        article_cache.store(url, response_headers, content_type, body, text, PARSER_VERSION)
+
+Entries are keyed by canonical URL (lowercased host, no fragment, default
+port or tracking parameters, sorted query), so the same article linked from
+different searches is fetched once. Freshness follows the response's
+Cache-Control (no-store, no-cache, max-age, s-maxage) and Expires headers,
+then the usual Last-Modified heuristic, then ARTICLE_CACHE_DEFAULT_TTL.
+A stale entry is revalidated with its ETag/Last-Modified; a 304 serves the
+stored text without downloading or parsing the page again.
+
+The page body is kept too (zlib-compressed) and every entry records the
+PARSER_VERSION that produced its text, so a changed extractor reparses the
+stored body instead of refetching. There is no in-process tier: texts are
+large and a primary-key read from sqlite is cheap next to a page fetch. The
+file is shared by worker processes and is trimmed to ARTICLE_CACHE_MAX_MB,
+least recently used first, every PRUNE_EVERY writes. Recency is kept to
+TOUCH_SECONDS, which is plenty for eviction and keeps hits read-only.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from app.utils.config import ARTICLE_CACHE_PATH, ARTICLE_CACHE_MAX_MB, ARTICLE_CACHE_DEFAULT_TTL
+
+PRUNE_EVERY = 100  # disk writes between size sweeps
+TOUCH_SECONDS = 300  # a read rewrites last_used only when it is older than this, so most hits never write
+HEURISTIC_MAX_SECONDS = 86400  # cap on freshness guessed from Last-Modified
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref_src"}
+
+
+def canonical_url(url):
+    """Normalizes a URL so trivially different links to one article share a cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def url_key(url):
+    return hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+
+
+def _header(headers, name):
+    """Case-insensitive header lookup that works for requests, httpx and plain dicts."""
+    value = headers.get(name)
+    if value is None:
+        for key, candidate in headers.items():
+            if key.lower() == name.lower():
+                return candidate
+    return value
+
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def cache_control(headers):
+    """Cache-Control directives as a dict; valueless directives map to True."""
+    directives = {}
+    for part in (_header(headers, "Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or True
+    return directives
+
+
+def freshness_lifetime(headers, now):
+    """
+    Seconds a response stays fresh from now, or None if it must not be stored.
+    0 means it may be stored but has to be revalidated before every use.
+    """
+    directives = cache_control(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+
+    age = 0
+    try:
+        age = max(int(_header(headers, "Age") or 0), 0)
+    except ValueError:
+        pass
+    for name in ("s-maxage", "max-age"):
+        try:
+            return max(int(directives[name]) - age, 0)
+        except (KeyError, ValueError):
+            continue
+
+    date = _http_date(_header(headers, "Date")) or now
+    expires = _header(headers, "Expires")
+    if expires is not None:
+        expires_at = _http_date(expires)
+        return max(expires_at - date, 0) if expires_at else 0  # an invalid Expires means already expired
+
+    last_modified = _http_date(_header(headers, "Last-Modified"))
+    if last_modified:
+        return min(max(date - last_modified, 0) * 0.1, HEURISTIC_MAX_SECONDS)
+    return ARTICLE_CACHE_DEFAULT_TTL
+
+
+class ArticleCache:
+    def __init__(self, path=ARTICLE_CACHE_PATH, max_mb=ARTICLE_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.stats = {"fresh_hits": 0, "stale": 0, "revalidated": 0, "misses": 0, "stores": 0, "evicted": 0}
+
+        self._conn = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS articles (
+                        url_key TEXT PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        content_type TEXT NOT NULL,
+                        etag TEXT,
+                        last_modified TEXT,
+                        body BLOB NOT NULL,
+                        text TEXT NOT NULL,
+                        parser TEXT NOT NULL,
+                        fresh_until REAL NOT NULL,
+                        last_used REAL NOT NULL,
+                        size INTEGER NOT NULL
+                    )
+                    """
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS articles_last_used ON articles (last_used)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Article cache disabled: {e}")
+                self._conn = None
+
+    def lookup(self, url):
+        """
+        Returns the stored entry for a URL as a dict (text, content_type, etag,
+        last_modified, parser, fresh) or None.
+        """
+        if self._conn is None:
+            return None
+        key = url_key(url)
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT text, content_type, etag, last_modified, parser, fresh_until, last_used "
+                    "FROM articles WHERE url_key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[6] > TOUCH_SECONDS:
+                    self._conn.execute("UPDATE articles SET last_used = ? WHERE url_key = ?", (now, key))
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Article cache read error: {e}")
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            fresh = row[5] > now
+            self.stats["fresh_hits" if fresh else "stale"] += 1
+        return {"text": row[0], "content_type": row[1], "etag": row[2], "last_modified": row[3],
+                "parser": row[4], "fresh": fresh}
+
+    def body(self, url):
+        """The stored page body, for reparsing with a newer extractor."""
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM articles WHERE url_key = ?", (url_key(url),)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    @staticmethod
+    def unconditional_headers(headers):
+        """Request headers without validators, for refetching a page the cache holds no copy of."""
+        return {name: value for name, value in (headers or {}).items()
+                if name.lower() not in ("if-none-match", "if-modified-since")}
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Validators to send when revalidating a stale entry (none without one)."""
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, headers, content_type, body, text, parser):
+        """Stores a 200 response and its extracted text, unless the response forbids it."""
+        if self._conn is None:
+            return
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        if lifetime is None:
+            return
+        compressed = zlib.compress(body)
+        size = len(compressed) + len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO articles (url_key, url, content_type, etag, last_modified, body, text, "
+                    "parser, fresh_until, last_used, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url_key(url), canonical_url(url), content_type, _header(headers, "ETag"),
+                     _header(headers, "Last-Modified"), compressed, text, parser, now + lifetime, now, size)
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= PRUNE_EVERY:
+                    self._prune()
+                self._conn.commit()
+                self.stats["stores"] += 1
+            except sqlite3.Error as e:
+                print(f"Article cache write error: {e}")
+
+    def revalidated(self, url, headers, text=None, parser=None):
+        """
+        Records a 304: the entry is fresh again under the new headers. Pass text
+        and parser when the stored body had to be reparsed by a newer extractor.
+        """
+        if self._conn is None:
+            return
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now) or 0
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "UPDATE articles SET fresh_until = ?, last_used = ?, etag = COALESCE(?, etag), "
+                    "last_modified = COALESCE(?, last_modified), text = COALESCE(?, text), "
+                    "parser = COALESCE(?, parser) WHERE url_key = ?",
+                    (now + lifetime, now, _header(headers, "ETag"), _header(headers, "Last-Modified"),
+                     text, parser, url_key(url))
+                )
+                self._conn.commit()
+                self.stats["revalidated"] += 1
+            except sqlite3.Error as e:
+                print(f"Article cache write error: {e}")
+
+    def _prune(self):
+        """Evicts least recently used entries beyond max_bytes. Caller holds the lock."""
+        self._writes_since_prune = 0
+        cursor = self._conn.execute(
+            "DELETE FROM articles WHERE url_key IN ("
+            "SELECT url_key FROM (SELECT url_key, SUM(size) OVER (ORDER BY last_used DESC) AS running "
+            "FROM articles) WHERE running > ?)",
+            (self.max_bytes,)
+        )
+        self.stats["evicted"] += cursor.rowcount
+
+    def get_stats(self):
+        """Hit counters plus the number and total size of stored pages."""
+        with self._lock:
+            stats = dict(self.stats)
+            if self._conn is not None:
+                try:
+                    stats["entries"], stored = self._conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM articles").fetchone()
+                    stats["size_mb"] = round(stored / (1024 * 1024), 2)
+                except sqlite3.Error:
+                    pass
+        stats["max_mb"] = self.max_bytes / (1024 * 1024)
+        lookups = stats["fresh_hits"] + stats["stale"] + stats["misses"]
+        stats["hit_rate"] = (stats["fresh_hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        return stats
+
+
+article_cache = ArticleCache()
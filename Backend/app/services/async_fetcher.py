@@ -0,0 +1,188 @@
+"""
+asyncio fetch engine for article pages.
+
+One event loop runs in a background thread for the whole process, with one
+httpx.AsyncClient whose keep-alive pool is reused by every request. Hundreds
+of pages can be in flight at once; FETCH_PER_HOST_LIMIT still caps each host.
+Each page has its own deadline (FETCH_REQUEST_DEADLINE, body included). A
+batch stops waiting at FETCH_BATCH_DEADLINE, or as soon as enough pages were
+extracted, and cancels the stragglers. HTML/PDF parsing is CPU-bound and runs
+in a separate process (or thread) pool, so it never blocks the loop. Pages go
+through the article cache exactly as in extract_main_content.
+
+    contents = async_fetch_engine.fetch_all(urls, deadline=15, enough=10)
+    future = async_fetch_engine.submit(url)  # concurrent.futures.Future of the text
+"""
+import asyncio
+import multiprocessing
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import httpx
+
+from app.services.article_cache import article_cache
+from app.services.content_scraper import is_usable, revalidated_content
+from app.services.page_parser import PARSER_VERSION, parse_content, declared_encoding, is_extracted
+from app.utils.config import (
+    FETCH_ASYNC_MAX_CONNECTIONS, FETCH_PER_HOST_LIMIT, FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT,
+    FETCH_REQUEST_DEADLINE, FETCH_BATCH_DEADLINE, FETCH_PARSE_POOL, FETCH_PARSE_WORKERS
+)
+from app.utils.http_fetcher import PAGE_HEADERS
+
+
+class AsyncFetchEngine:
+    def __init__(self, max_connections=FETCH_ASYNC_MAX_CONNECTIONS, per_host_limit=FETCH_PER_HOST_LIMIT,
+                 request_deadline=FETCH_REQUEST_DEADLINE, parse_pool=FETCH_PARSE_POOL,
+                 parse_workers=FETCH_PARSE_WORKERS):
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.request_deadline = request_deadline
+        self.parse_pool_kind = parse_pool
+        self.parse_workers = parse_workers
+        self._loop = None
+        self._client = None
+        self._parse_pool = None
+        self._host_slots = None
+        self._lock = threading.Lock()
+        self.stats = {"fetched": 0, "failed": 0, "timed_out": 0, "cancelled": 0}
+
+    def start(self):
+        """Starts the event loop thread, the shared client and the parse pool (on first use, or at app start)."""
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="async-fetch-loop", daemon=True).start()
+
+            async def setup():
+                self._client = httpx.AsyncClient(
+                    headers=PAGE_HEADERS,
+                    timeout=httpx.Timeout(FETCH_READ_TIMEOUT, connect=FETCH_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections),
+                    follow_redirects=True,
+                )
+                self._host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+
+            asyncio.run_coroutine_threadsafe(setup(), loop).result()
+            if self.parse_pool_kind == "process":
+                # spawn: forking a process that holds model threads and locks is not safe. Workers
+                # unpickle page_parser.parse_content, so they import the parsing modules and not the app
+                self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers,
+                                                       mp_context=multiprocessing.get_context("spawn"))
+                # Spawned workers take a while to import; start them now rather than inside the first deadline
+                for _ in range(self.parse_workers):
+                    self._parse_pool.submit(parse_content, "", "text/html", b"")
+            else:
+                self._parse_pool = ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix="parse")
+            self._loop = loop
+            return loop
+
+    async def _download(self, url, headers):
+        async with self._host_slots[httpx.URL(url).host]:
+            response = await self._client.get(url, headers=headers)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response.status_code, response.headers, response.headers.get("Content-Type", ""), response.content
+
+    async def _fetch(self, url, headers=None, deadline=None):
+        """Downloads a page within its deadline and parses it off the loop. Returns text or an error message."""
+        deadline = deadline or self.request_deadline
+        loop = asyncio.get_running_loop()
+        # One budget for the page: a refetch after a 304 only gets what is left of it
+        expires_at = loop.time() + deadline
+        # sqlite calls run on the default executor so they never block the loop
+        entry = await loop.run_in_executor(None, article_cache.lookup, url)
+        if is_usable(entry):
+            return entry["text"]
+        try:
+            status, response_headers, content_type, body = await asyncio.wait_for(
+                self._download(url, dict(headers or {}, **article_cache.conditional_headers(entry))), deadline
+            )
+            if status == 304:
+                content = None
+                if entry:
+                    content = await loop.run_in_executor(None, revalidated_content, url, entry, response_headers)
+                if content is not None:
+                    return content
+                # Nothing cached to serve (caller's own validators, or evicted meanwhile): fetch the whole page
+                remaining = expires_at - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                status, response_headers, content_type, body = await asyncio.wait_for(
+                    self._download(url, article_cache.unconditional_headers(headers)), remaining
+                )
+                if status == 304:
+                    self.stats["failed"] += 1
+                    return "Error retrieving content: 304 Not Modified without a cached copy"
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            return f"Error retrieving content: no complete response within {deadline}s"
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            self.stats["failed"] += 1
+            return f"Error retrieving content: {str(e)}"
+        except Exception as e:
+            self.stats["failed"] += 1
+            return f"Error processing content: {str(e)}"
+
+        try:
+            content = await loop.run_in_executor(
+                self._parse_pool, parse_content, url, content_type, body, declared_encoding(content_type)
+            )
+        except Exception as e:
+            self.stats["failed"] += 1
+            return f"Error processing content: {str(e)}"
+        self.stats["fetched"] += 1
+        if is_extracted(content):
+            await loop.run_in_executor(None, article_cache.store, url, response_headers, content_type, body,
+                                       content, PARSER_VERSION)
+        return content
+
+    def submit(self, url, headers=None, deadline=None):
+        """Schedules one page; returns a concurrent.futures.Future of its extracted text."""
+        loop = self.start()
+        return asyncio.run_coroutine_threadsafe(self._fetch(url, headers, deadline), loop)
+
+    async def _fetch_many(self, urls, deadline, enough):
+        loop = asyncio.get_running_loop()
+        tasks = {asyncio.ensure_future(self._fetch(url)): i for i, url in enumerate(urls)}
+        contents = [None] * len(urls)
+        extracted = 0
+        pending = set(tasks)
+        end = loop.time() + deadline
+        while pending:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                contents[tasks[task]] = task.result()
+                extracted += is_extracted(task.result())
+            if enough and extracted >= enough:
+                break
+
+        # Stragglers: past the batch deadline, or no longer needed
+        for task in pending:
+            task.cancel()
+            contents[tasks[task]] = ("Error retrieving content: cancelled, enough articles were extracted"
+                                     if enough and extracted >= enough
+                                     else f"Error retrieving content: cancelled after {deadline}s")
+        self.stats["cancelled"] += len(pending)
+        return contents
+
+    def fetch_all(self, urls, deadline=FETCH_BATCH_DEADLINE, enough=None):
+        """
+        Fetches and extracts all urls concurrently. Returns texts (or error
+        messages) aligned with urls; pages still loading when the deadline passes
+        or once `enough` pages were extracted are cancelled.
+        """
+        loop = self.start()
+        return asyncio.run_coroutine_threadsafe(self._fetch_many(urls, deadline, enough), loop).result()
+
+    def get_stats(self):
+        """Page counters of the engine."""
+        return dict(self.stats, engine="async", parse_pool=self.parse_pool_kind)
+
+
+async_fetch_engine = AsyncFetchEngine()
@@ -0,0 +1,241 @@
+"""
+Index over verified claims in QueryData.
+
+Every verified claim is logged with its MiniLM-L12 embedding, its best score
+and top source. The same rows go into a memory-mapped vector index, so a new
+claim can be matched against the whole history before any searching or
+scraping happens, without decoding stored rows into Python objects.
+
+start() backfills a new index from QueryData and then pulls in rows logged
+elsewhere every CLAIM_INDEX_REFRESH_SECONDS, in a background thread, so no
+request ever waits on the database for it.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.database.sql import DatabaseAccess
+from app.database.vector_codec import load_embedding
+from app.database.vector_index import VectorIndex, fcntl
+from app.utils.config import (
+    CLAIM_INDEX_PATH, CLAIM_INDEX_DTYPE, CLAIM_INDEX_COMPACT_TAIL, CLAIM_INDEX_RETENTION_HOURS,
+    CLAIM_INDEX_REFRESH_SECONDS
+)
+
+CLAIM_EMBEDDING_DIM = 384  # all-MiniLM-L12-v2
+# Each refresh re-reads this much before the database cursor, for rows the write-behind logger flushed late
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def _parse_time(value):
+    """QueryData.date_minute comes back as a datetime, or as text on some drivers."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S")
+
+
+class ClaimHistory:
+    def __init__(self, path=CLAIM_INDEX_PATH, dtype=CLAIM_INDEX_DTYPE,
+                 compact_tail=CLAIM_INDEX_COMPACT_TAIL, retention_hours=CLAIM_INDEX_RETENTION_HOURS,
+                 refresh_seconds=CLAIM_INDEX_REFRESH_SECONDS):
+        self.path = path
+        self.dtype = dtype
+        self.compact_tail = compact_tail
+        self.retention_hours = retention_hours
+        self.refresh_seconds = refresh_seconds
+        self._index = None
+        self._lock = threading.Lock()
+        self._compacting = False
+        self._started = False
+
+    def _get_index(self):
+        """Opens the index on first use. Backfilling is left to start(), off the request path."""
+        with self._lock:
+            if self._index is None:
+                self._index = VectorIndex(self.path, CLAIM_EMBEDDING_DIM, self.dtype)
+            return self._index
+
+    def ensure_backfilled(self):
+        """
+        Loads QueryData into the index unless that was done already. Workers
+        starting together backfill it only once. The database cursor is the
+        "built" marker: it is only written after a backfill read the whole table,
+        so claims add()ed before the backfill got the lock never count as one.
+        """
+        self._get_index()
+        with self._database_lock():
+            if self._read_cursor() is None:
+                self.backfill_from_database()
+
+    def start(self):
+        """Backfills, then periodically refreshes, the index in a background thread."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        def run():
+            while True:
+                try:
+                    # A no-op once built; a failed backfill is retried on the next round
+                    self.ensure_backfilled()
+                    self.refresh()
+                except Exception as e:
+                    print(f"Claim index sync failed: {e}")
+                time.sleep(max(self.refresh_seconds, 1))
+
+        threading.Thread(target=run, name="claim-history-sync", daemon=True).start()
+
+    @contextmanager
+    def _database_lock(self):
+        """Serializes backfills and refreshes across the workers sharing the index directory."""
+        with open(os.path.join(self.path, ".backfill.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _read_cursor(self):
+        """date_minute of the newest QueryData row read from the database, or None before the backfill."""
+        try:
+            with open(os.path.join(self.path, "db_cursor.txt")) as f:
+                return _parse_time(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write_cursor(self, cursor):
+        tmp = os.path.join(self.path, "db_cursor.txt.tmp")
+        with open(tmp, "w") as f:
+            f.write(cursor.strftime('%Y-%m-%d %H:%M:%S'))
+        os.replace(tmp, os.path.join(self.path, "db_cursor.txt"))
+
+    def _insert_rows(self, rows, known=frozenset(), chunk_size=10000):
+        """
+        Indexes QueryData rows, skipping (input, logged_at) pairs in known.
+        Returns the newest date_minute read, indexed or not.
+        """
+        newest = None
+        for start in range(0, len(rows), chunk_size):
+            vectors, metas, timestamps = [], [], []
+            for input_text, score, url, embedding, logged_at in rows[start:start + chunk_size]:
+                try:
+                    logged_at = _parse_time(logged_at)
+                    newest = max(newest or logged_at, logged_at)
+                    stamp = logged_at.strftime('%Y-%m-%d %H:%M:%S')
+                    if (input_text, stamp) in known:
+                        continue
+                    vectors.append(load_embedding(embedding))
+                except (ValueError, TypeError) as e:
+                    print(f"Skipping unreadable QueryData row: {e}")
+                    continue
+                metas.append({"input": input_text, "score": float(score), "url": url, "logged_at": stamp})
+                timestamps.append(logged_at.timestamp())
+            if vectors:
+                self._index.insert(np.vstack(vectors), metas, timestamps)
+        return newest
+
+    def backfill_from_database(self, since=None):
+        """
+        Loads QueryData rows logged since (default: everything) into the index,
+        one page of rows at a time. Rows already in the index (claims add()ed
+        while the backfill waited, or an index built before the cursor existed)
+        are recognised by their (input, logged_at) pair, as in refresh().
+        """
+        started = datetime.now()
+        known = {(meta.get("input"), meta.get("logged_at")) for meta in self._index.metas_since(0)}
+        newest = None
+        for rows in DatabaseAccess().iter_queries(since or datetime(1970, 1, 2)):
+            batch_newest = self._insert_rows(rows, known)
+            if batch_newest is not None and (newest is None or batch_newest > newest):
+                newest = batch_newest
+        self._write_cursor(newest or started)
+        print(f"Claim index backfilled with {len(self._index)} rows")
+
+    def refresh(self):
+        """
+        Pulls in QueryData rows that reached the database without passing through
+        this index: rows from other hosts or from workers using another index path.
+
+        The database cursor only advances with rows read from the database, never
+        with claims add()ed locally, so a local add cannot hide older rows other
+        workers logged. Reads overlap the cursor by REFRESH_OVERLAP, and rows
+        already indexed (locally added ones included) are recognised by their
+        (input, logged_at) pair.
+        """
+        index = self._get_index()
+        with self._database_lock():
+            cursor = self._read_cursor()
+            if cursor is None:
+                return  # not backfilled yet
+            since = cursor - REFRESH_OVERLAP
+            rows = DatabaseAccess().fetch_recent_queries(since)
+            if not rows:
+                return
+            known = {(meta.get("input"), meta.get("logged_at")) for meta in index.metas_since(since.timestamp())}
+            newest = self._insert_rows(rows, known)
+            if newest is not None and newest > cursor:
+                self._write_cursor(newest)
+
+    def add(self, input_text, vector, score, url, logged_at=None):
+        """
+        Indexes a claim right after it was logged to QueryData. Pass the logged_at
+        given to query_logger so refresh() recognises the row when it reads it back.
+        """
+        logged_at = logged_at or datetime.now()
+        index = self._get_index()
+        index.insert(vector, [{"input": input_text, "score": float(score), "url": url,
+                               "logged_at": logged_at.strftime('%Y-%m-%d %H:%M:%S')}],
+                     [logged_at.timestamp()])
+        if index.tail_size() >= self.compact_tail:
+            self._compact_in_background()
+
+    def _compact_in_background(self):
+        """Re-clusters the index off the request path once enough unclustered rows piled up."""
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def run():
+            try:
+                min_timestamp = time.time() - self.retention_hours * 3600 if self.retention_hours else None
+                self._index.compact(min_timestamp=min_timestamp)
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, name="claim-index-compaction", daemon=True).start()
+
+    def lookup(self, vector, threshold, max_age_hours):
+        """
+        Returns the most similar claim verified within max_age_hours if its
+        cosine similarity is at least threshold, else None.
+        """
+        hits = self._get_index().search(
+            vector, k=1, threshold=threshold, min_timestamp=time.time() - max_age_hours * 3600
+        )
+        if not hits:
+            return None
+        match = hits[0]
+        match["logged_at"] = _parse_time(match["logged_at"])
+        return match
+
+
+claim_history = ClaimHistory()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the claim history index")
+    parser.add_argument("--compact", action="store_true", help="re-cluster the index and drop expired rows")
+    args = parser.parse_args()
+
+    claim_history.ensure_backfilled()
+    index = claim_history._get_index()
+    print(f"{len(index)} claims indexed, {index.tail_size()} not yet clustered")
+    if args.compact:
+        retention = claim_history.retention_hours
+        index.compact(min_timestamp=time.time() - retention * 3600 if retention else None)
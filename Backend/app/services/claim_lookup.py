@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+
+from app.services.claim_history import claim_history
+from app.services.embedding import cached_embed_texts, get_sentence_model
+from app.services.scoring_profiles import CLAIM_EMBEDDING_MODEL
+from app.utils.config import CLAIM_LOOKUP_THRESHOLD, CLAIM_LOOKUP_MAX_AGE_HOURS
+
+claim_lookup_blueprint = Blueprint("claim_lookup_blueprint", __name__)
+
+
+@claim_lookup_blueprint.route("/", methods=["POST"])
+def lookup_claim():
+    """
+    Checks whether a near-identical claim was verified recently.
+
+    Expects {"text": claim, "similarity_threshold" (optional), "max_age_hours" (optional)}.
+    Returns {"found": false} or the cached verdict of the closest previous claim.
+    """
+    data = request.get_json()
+    text = data.get("text", "")
+    threshold = data.get("similarity_threshold", CLAIM_LOOKUP_THRESHOLD)
+    max_age_hours = data.get("max_age_hours", CLAIM_LOOKUP_MAX_AGE_HOURS)
+
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    claim_vec = cached_embed_texts([text], get_sentence_model(CLAIM_EMBEDDING_MODEL), CLAIM_EMBEDDING_MODEL)[0]
+    match = claim_history.lookup(claim_vec, threshold, max_age_hours)
+    if match is None:
+        return jsonify({"found": False})
+
+    return jsonify({
+        "found": True,
+        "matched_claim": match["input"],
+        "similarity": match["similarity"],
+        "highest_score": match["score"],
+        "supporting_article": match["url"],
+        "verified_at": match["logged_at"].strftime('%Y-%m-%d %H:%M:%S'),
+    })
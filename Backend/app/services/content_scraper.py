@@ -1,77 +1,38 @@
 import requests
-from bs4 import BeautifulSoup
 from flask import Blueprint, request, jsonify
-import io
-import PyPDF2
 import concurrent.futures
 
+from app.services.article_cache import article_cache
+from app.services.extraction_rules import extraction_rules
+from app.services.page_parser import PARSER_VERSION, parse_content, declared_encoding, is_extracted
+from app.utils.config import FETCH_ENGINE, FETCH_BATCH_DEADLINE
+from app.utils.http_fetcher import http_fetcher
+
 scrape_content_blueprint = Blueprint("scrape_content_blueprint", __name__)
 
 
 def extract_main_content(url, headers=None):
+    # Fresh cached pages need no request; stale ones are revalidated with their ETag/Last-Modified
+    entry = article_cache.lookup(url)
+    if is_usable(entry):
+        return entry["text"]
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        # Shared keep-alive session: connections to the same news site are reused across URLs and requests
+        response = http_fetcher.get(url, headers=dict(headers or {}, **article_cache.conditional_headers(entry)))
+        if response.status_code == 304:
+            content = revalidated_content(url, entry, response.headers) if entry else None
+            if content is not None:
+                return content
+            # Nothing cached to serve (caller's own validators, or evicted meanwhile): fetch the whole page
+            response = http_fetcher.get(url, headers=article_cache.unconditional_headers(headers))
+            if response.status_code == 304:
+                return "Error retrieving content: 304 Not Modified without a cached copy"
         response.raise_for_status()  # Raise an error for bad responses (e.g. 404, 500)
         content_type = response.headers.get('Content-Type', '')
-
-        # Process based on content type
-        if 'html' in content_type.lower():
-            try:
-                soup = BeautifulSoup(response.text, "html.parser")
-            except Exception as e:
-                # If default parser fails, try a different parser
-                soup = BeautifulSoup(response.text, "lxml")
-
-            # Try extracting common content elements from news sites
-            content_selectors = [
-                "article",  # Many sites wrap content in <article> tags
-                "div.story-body", "div.post-content",  # BBC, blogs, medium, etc.
-                "div.entry-content", "div.article-content", "div.main-content",
-                "section.article-body", "div.content__article-body",  # Common structures
-                "p"  # Last fallback: Grab all paragraphs
-            ]
-
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    # Concatenate text from all found elements
-                    print("Content scrap successful (HTML)")
-                    extracted_text = " ".join([el.get_text(strip=True) for el in elements])
-                    if extracted_text:
-                        return extracted_text
-
-            return "Main content not found in HTML."
-
-        elif 'xml' in content_type.lower():
-            # Process XML content
-            soup = BeautifulSoup(response.text, "xml")
-            extracted_text = soup.get_text(strip=True)
-            if extracted_text:
-                print("Content scrap successful (XML)")
-                return extracted_text
-            else:
-                return "Main content not found in XML."
-
-        # PDF branch
-        elif 'pdf' in content_type.lower() or url.lower().endswith('.pdf'):
-            try:
-                pdf_data = io.BytesIO(response.content)
-                reader = PyPDF2.PdfReader(pdf_data, strict=False)
-                extracted_text = ""
-                for page in reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        extracted_text += text + "\n"
-                if extracted_text:
-                    print("Content scrap successful (PDF)")
-                    return extracted_text
-                else:
-                    return "Main content not found in PDF."
-            except Exception as pdf_error:
-                return f"Error processing PDF: {str(pdf_error)}"
-
-        else:
-            return f"Content is neither HTML, XML, nor PDF. Detected content type: {content_type}"
+        content = parse_content(url, content_type, response.content, declared_encoding(content_type))
+        if is_extracted(content):
+            article_cache.store(url, response.headers, content_type, response.content, content, PARSER_VERSION)
+        return content
 
     except requests.exceptions.RequestException as e:
         return f"Error retrieving content: {str(e)}"
@@ -79,9 +40,35 @@ def extract_main_content(url, headers=None):
         return f"Error processing content: {str(e)}"
 
 
+def is_usable(entry):
+    """A cached page that is fresh and was extracted by the current parser."""
+    return bool(entry) and entry["fresh"] and entry["parser"] == PARSER_VERSION
+
+
+def revalidated_content(url, entry, response_headers):
+    """
+    Text of a cached page the server answered 304 for, or None if the page has
+    to be fetched again. The stored text is reused as is; only text from an
+    older parser is re-extracted from the stored body.
+    """
+    if entry["parser"] == PARSER_VERSION:
+        article_cache.revalidated(url, response_headers)
+        return entry["text"]
+    body = article_cache.body(url)
+    if body is None:
+        return None  # evicted since the lookup
+    content = parse_content(url, entry["content_type"], body, declared_encoding(entry["content_type"]))
+    article_cache.revalidated(url, response_headers, content, PARSER_VERSION)
+    return content
+
+
 @scrape_content_blueprint.route("/", methods=["POST"])
 def scrape_content():
-    """Fetches and extracts the main body of an article from a given URL concurrently."""
+    """
+    Fetches and extracts the main body of an article from a given URL concurrently.
+    Optional "deadline" (seconds) and "min_articles" let the async engine stop
+    waiting for slow sites once the deadline passes or enough articles are in.
+    """
     data = request.get_json()
     urls = data.get("results")  # list of dicts: {title: title, url: url, reliability: r}
 
@@ -90,11 +77,30 @@ def scrape_content():
     if not urls:
         return jsonify({"error": "No URL data provided"}), 400
 
+    items = [item for item in urls if item.get("url")]
+
+    if FETCH_ENGINE == "async":
+        from app.services.async_fetcher import async_fetch_engine
+
+        contents = async_fetch_engine.fetch_all(
+            [item.get("url") for item in items],
+            deadline=data.get("deadline", FETCH_BATCH_DEADLINE),
+            enough=data.get("min_articles")
+        )
+        for item, content in zip(items, contents):
+            return_data.append({
+                "url": item.get("url"),
+                "title": item.get("title"),
+                "reliability": item.get("reliability"),
+                "article_content": content
+            })
+        return jsonify({"results": return_data})
+
     # Use a ThreadPoolExecutor to process URLs concurrently
     with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
         # Submit tasks for each URL extraction
         future_to_item = {
-            executor.submit(extract_main_content, item.get("url")): item for item in urls if item.get("url")
+            executor.submit(extract_main_content, item.get("url")): item for item in items
         }
 
         for future in concurrent.futures.as_completed(future_to_item):
@@ -111,3 +117,25 @@ def scrape_content():
             })
 
     return jsonify({"results": return_data})
+
+
+@scrape_content_blueprint.route("/fetch_stats", methods=["GET"])
+def fetch_stats():
+    """Returns request counters of the page fetchers."""
+    stats = {"threads": http_fetcher.get_stats()}
+    if FETCH_ENGINE == "async":
+        from app.services.async_fetcher import async_fetch_engine
+        stats["async"] = async_fetch_engine.get_stats()
+    return jsonify(stats)
+
+
+@scrape_content_blueprint.route("/cache_stats", methods=["GET"])
+def article_cache_stats():
+    """Returns hit counters and the size of the article cache."""
+    return jsonify(article_cache.get_stats())
+
+
+@scrape_content_blueprint.route("/rule_stats", methods=["GET"])
+def extraction_rule_stats():
+    """Returns how often learned per-domain extraction rules were used."""
+    return jsonify(extraction_rules.get_stats())
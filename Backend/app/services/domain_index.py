@@ -0,0 +1,84 @@
+"""
+Credibility index over the domains in app/data/credible_domains.json.
+
+Domains are stored in a trie keyed by reversed labels (com -> straitstimes),
+so classifying a host walks at most one node per label of the host instead of
+scanning every listed domain. A listed domain matches a host on whole labels:
+"gov" matches cdc.gov and moh.gov.sg, but not xgov.com. The most specific
+listed domain decides the tier.
+"""
+import json
+from urllib.parse import urlparse
+
+from app.utils.config import DOMAIN_INDEX_PATH
+
+WILDCARD = "*"
+TIER = "$"  # trie key holding the tier of the domain ending at that node
+
+
+def host_of(url):
+    """Lower-cased host of a URL without port or leading www."""
+    try:
+        host = (urlparse(url).hostname or "").rstrip(".")
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class DomainIndex:
+    def __init__(self, entries):
+        self._root = {}
+        self._search = {}
+        for entry in entries:
+            node = self._root
+            for label in reversed(entry["domain"].lower().split(".")):
+                node = node.setdefault(label, {})
+            node[TIER] = entry["tier"]
+            for rotation in entry.get("search", []):
+                self._search.setdefault(rotation, []).append(entry["domain"])
+
+    @classmethod
+    def load(cls, path=DOMAIN_INDEX_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["domains"])
+
+    def _match(self, node, labels, depth):
+        """(depth, tier) of the deepest listed domain along labels, trying exact labels before *."""
+        best = (depth, node[TIER]) if TIER in node else None
+        if depth == len(labels):
+            return best
+        for key in (labels[depth], WILDCARD):
+            child = node.get(key)
+            if child is not None:
+                found = self._match(child, labels, depth + 1)
+                if found is not None and (best is None or found[0] > best[0]):
+                    best = found
+        return best
+
+    def tier(self, domain):
+        """Credibility tier of a host name (e.g. "news", "government"), or None if not listed."""
+        domain = domain.lower().rstrip(".")
+        if domain.startswith("www."):
+            domain = domain[4:]
+        if not domain:
+            return None
+        found = self._match(self._root, domain.split(".")[::-1], 0)
+        return found[1] if found else None
+
+    def classify_urls(self, urls):
+        """Tier (or None) for each URL, looking each distinct host up once."""
+        tiers = {}
+        result = []
+        for url in urls:
+            host = host_of(url)
+            if host not in tiers:
+                tiers[host] = self.tier(host)
+            result.append(tiers[host])
+        return result
+
+    def search_domains(self, rotation):
+        """Domains of a site: filter rotation ("global", "singapore") in file order."""
+        return list(self._search.get(rotation, []))
+
+
+domain_index = DomainIndex.load()
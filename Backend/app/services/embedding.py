@@ -1,28 +1,36 @@
-import json
-
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-import torch
-import torch.nn.functional as F
-
-
-modelname = "cardiffnlp/twitter-roberta-base-sentiment"
-tokenizer = AutoTokenizer.from_pretrained(modelname)
-model = AutoModelForSequenceClassification.from_pretrained(modelname)
 
 from flask import Blueprint, request, jsonify
-from app.database.sql import DatabaseAccess
+from app.database.query_logger import query_logger
 from app.database import sql
+from app.utils.config import (
+    EMBEDDING_BATCH_SIZE, PASSAGE_MODE, PASSAGE_TOP_K, PASSAGE_WINDOW, PASSAGE_POOLING,
+    DEFAULT_SCORING_PROFILE, DEGRADE_INFLIGHT_THRESHOLD, SENTIMENT_ENABLED, EMBEDDING_BATCHER_ENABLED,
+    QUERY_EMBEDDING_DTYPE
+)
+from app.services.embedding_cache import embedding_cache
+from app.services.embedding_batcher import embedding_batcher
+from app.services.claim_history import claim_history
+from app.services.passages import select_passages
+from app.services.scoring_profiles import resolve_profile, CLAIM_EMBEDDING_MODEL, SCORING_PROFILES
+from app.services.stance import sentiment_vectors, stance_scores
+from app.utils.model_registry import get_model
+import threading
+from datetime import datetime
 
 embedding_blueprint = Blueprint("embedding_blueprint", __name__)
 
 
-model1 = SentenceTransformer("all-MiniLM-L12-v2")
-model2 = SentenceTransformer("all-mpnet-base-v2")
-model3 = SentenceTransformer("paraphrase-mpnet-base-v2")
-model4 = SentenceTransformer("all-MiniLM-L6-v2")
+# Number of /embedding requests currently being scored, used to degrade under load
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def get_sentence_model(name):
+    """Returns the shared SentenceTransformer called name from the model registry."""
+    return get_model(name)
+
 q=True
 def embed_text(text,model):
     """
@@ -31,15 +39,41 @@ def embed_text(text,model):
 
     return model.encode(text, convert_to_numpy=True)
 
+def embed_texts(texts, model, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Encodes a list of texts with a single batched encode call.
+    Returns an array of shape (len(texts), dim).
+    """
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+def cached_embed_texts(texts, model, model_name, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Same as embed_texts, but vectors already in the embedding cache are reused
+    and only the misses are sent to the model (still in one batch).
+    With the batcher enabled the misses share an encode call with concurrent requests.
+    """
+    vectors = embedding_cache.get_many(model_name, texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+    if missing:
+        # Duplicate texts in one request only need to be encoded once
+        unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+        if EMBEDDING_BATCHER_ENABLED:
+            encoded = embedding_batcher.encode(model_name, unique_texts)
+        else:
+            encoded = embed_texts(unique_texts, model, batch_size)
+        embedding_cache.put_many(model_name, unique_texts, encoded)
+        by_text = dict(zip(unique_texts, encoded))
+        for i in missing:
+            vectors[i] = by_text[texts[i]]
+
+    return np.vstack(vectors)
+
 def get_sentiment_vector(text):
     """Returns the probability distribution over sentiment classes."""
     if not isinstance(text, str):
         text = str(text)  # Convert non-string inputs to string
-    inputs = tokenizer(text, return_tensors="pt")
-    with torch.no_grad():
-        logits = model(**inputs).logits
-    probabilities = F.softmax(logits, dim=-1).squeeze().tolist()
-    return probabilities  # [prob_negative, prob_neutral, prob_positive]
+    return sentiment_vectors([text])[0].tolist()  # [prob_negative, prob_neutral, prob_positive]
 
 def compute_similarity(text_vec, article_vec):
     """
@@ -49,6 +83,125 @@ def compute_similarity(text_vec, article_vec):
 
     return cosine_sim
 
+def normalize_rows(vecs):
+    """L2-normalizes each row so a matrix product gives cosine similarities."""
+    vecs = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    return vecs / np.where(norms == 0, 1, norms)
+
+
+def similarity_matrix(claim_vecs, article_vecs):
+    """Cosine similarity of every claim row against every article row, shape (n_claims, n_articles)."""
+    return normalize_rows(claim_vecs) @ normalize_rows(article_vecs).T
+
+
+def pool_spans(sims, spans, pooling="max"):
+    """
+    Pools passage similarities (last axis of sims) into one value per article.
+    spans are contiguous (start, end) column ranges, one per article.
+    """
+    starts = [start for start, _end in spans]
+    if pooling == "mean":
+        lengths = np.array([end - start for start, end in spans])
+        return np.add.reduceat(sims, starts, axis=-1) / lengths
+    return np.maximum.reduceat(sims, starts, axis=-1)
+
+
+def ensemble_scores(model_sims, profile):
+    """
+    Turns per-model similarities (model axis first) into credibility scores:
+    mean over models (dropping the lowest for trimmed profiles), sigmoid, then bucket adjustment.
+    """
+    n_models = model_sims.shape[0]
+    if profile["trim_lowest"] and n_models > 1:
+        mean_sim = (model_sims.sum(axis=0) - model_sims.min(axis=0)) / (n_models - 1)
+    else:
+        mean_sim = model_sims.mean(axis=0)
+
+    k = profile["sigmoid_k"]  # Adjust steepness
+    t = profile["sigmoid_t"]  # Midpoint of transformation
+    scores = 1 / (1 + np.exp(-k * (mean_sim - t)))
+    return scores + np.select(
+        [scores > 0.6, scores < 0.4, scores < 0.6],
+        [0.08, -0.10, -0.15],
+        default=0.0
+    )
+
+
+def score_claims(claims, article_texts, profile, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Scores several claims against several whole articles at once.
+    Returns an array of shape (len(claims), len(article_texts)).
+    """
+    texts = list(claims) + list(article_texts)
+    model_sims = []
+    for name in profile["models"]:
+        vecs = cached_embed_texts(texts, get_sentence_model(name), name, batch_size)
+        model_sims.append(similarity_matrix(vecs[:len(claims)], vecs[len(claims):]))
+    return ensemble_scores(np.stack(model_sims), profile)
+
+
+def score_articles(input_text, articles, profile, batch_size=EMBEDDING_BATCH_SIZE,
+                   passage_mode=PASSAGE_MODE, passage_top_k=PASSAGE_TOP_K, passage_pooling=PASSAGE_POOLING,
+                   include_sentiment=False):
+    """
+    Scores each article (dict with 'article_content', 'url', 'title') against the claim
+    using the models of the given scoring profile.
+    Returns (similarities, claim_vecs, sentiment) where similarities is a list of (score, url, title),
+    claim_vecs maps each model name to its claim embedding and sentiment is the stance stage
+    output (None unless include_sentiment).
+    """
+    # Only articles with content are embedded; the claim goes in the same batch
+    articles = [article for article in articles if article.get("article_content", "")]
+    texts = [input_text]
+    spans = []  # (start, end) rows of each article in the encoded batch
+    for article in articles:
+        content = article.get("article_content")
+        if passage_mode:
+            chunks = select_passages(input_text, content, top_k=passage_top_k, window=PASSAGE_WINDOW)
+        else:
+            chunks = [content]
+        spans.append((len(texts), len(texts) + len(chunks)))
+        texts.extend(chunks)
+
+    # One encode call per model: row 0 is the claim, the rest are articles or passages
+    model_vecs = [
+        cached_embed_texts(texts, get_sentence_model(name), name, batch_size)
+        for name in profile["models"]
+    ]
+
+    similarities = []  # store tuples of (similarity, url, title)
+
+    if articles:
+        # One matrix product per model, then passages pooled back into articles
+        passage_spans = [(start - 1, end - 1) for start, end in spans]
+        model_sims = np.stack([
+            pool_spans(similarity_matrix(vecs[:1], vecs[1:])[0], passage_spans, passage_pooling)
+            for vecs in model_vecs
+        ])
+        scores = ensemble_scores(model_sims, profile)
+        similarities = [
+            (float(score), article.get("url"), article.get("title"))
+            for score, article in zip(scores, articles)
+        ]
+
+    sentiment = None
+    if include_sentiment:
+        # The claim is inferred once; every article's passages share one padded batch
+        claim_sentiment, article_sentiments = stance_scores(
+            input_text, [texts[start:end] for start, end in spans]
+        )
+        sentiment = {
+            "claim": claim_sentiment,
+            "articles": [
+                dict(entry, url=article.get("url"))
+                for article, entry in zip(articles, article_sentiments)
+            ],
+        }
+
+    claim_vecs = {name: vecs[0] for name, vecs in zip(profile["models"], model_vecs)}
+    return similarities, claim_vecs, sentiment
+
 
 @embedding_blueprint.route("/", methods=["POST"])
 def compute_credibility_score():
@@ -63,64 +216,48 @@ def compute_credibility_score():
        },
        ...
     ]
+
+    Optional "profile" picks a scoring profile ("full", "balanced", "fast").
     """
-    # 1) Embed the input text (user claim)
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+        in_flight = _in_flight
+    try:
+        return _compute_credibility_score(in_flight)
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+def _compute_credibility_score(in_flight):
     data = request.get_json()
     _ = data.get("article_info")  # list of {title : title, url:url, reliability: r}
     input_text = data.get("input_text")
-
-    claim_vec1 = embed_text(input_text,model1)
-    claim_vec2 = embed_text(input_text,model2)
-    claim_vec3 = embed_text(input_text, model3)
-    claim_vec4 = embed_text(input_text, model4)
-    claim_vec5 = get_sentiment_vector(input_text)
+    batch_size = data.get("batch_size", EMBEDDING_BATCH_SIZE)
+
+    profile_name, profile = resolve_profile(data.get("profile", DEFAULT_SCORING_PROFILE))
+    if DEGRADE_INFLIGHT_THRESHOLD and in_flight > DEGRADE_INFLIGHT_THRESHOLD and profile_name != "fast":
+        if SCORING_PROFILES["fast"]["calibrated"]:
+            # Under load, answer with the cheapest profile rather than time out
+            print(f"{in_flight} scoring requests in flight, degrading '{profile_name}' to 'fast'")
+            profile_name, profile = resolve_profile("fast")
+        else:
+            # Its verdicts would differ from the requested profile's; wait for calibration instead
+            print(f"{in_flight} scoring requests in flight, not degrading: 'fast' is not calibrated")
+
+    similarities, claim_vecs, sentiment = score_articles(
+        input_text, _ or [], profile, batch_size,
+        passage_mode=data.get("passage_mode", PASSAGE_MODE),
+        passage_top_k=data.get("passage_top_k", PASSAGE_TOP_K),
+        passage_pooling=data.get("passage_pooling", PASSAGE_POOLING),
+        include_sentiment=data.get("include_sentiment", SENTIMENT_ENABLED)
+    )
     total_score = 0
 
-    embedding_list = claim_vec1.tolist()
-    embedding_json = json.dumps(embedding_list)
-    db_connector = DatabaseAccess()
-
-
     if not _:
         return jsonify({"credibility_score": total_score})
 
-    similarities = []  # store tuples of (similarity, url)
-
-    for article in _:
-        url = article.get("url")
-        title = article.get("title")
-        article_content = article.get("article_content", "")
-
-        if not article_content:
-            continue
-
-        article_vec1 = embed_text(article_content,model1)
-        article_vec2 = embed_text(article_content,model2)
-        article_vec3 = embed_text(article_content,model3)
-        article_vec4 = embed_text(article_content,model4)
-
-        sim1 = compute_similarity(claim_vec1, article_vec1)
-        sim2 = compute_similarity(claim_vec2, article_vec2)
-        sim3 = compute_similarity(claim_vec3, article_vec3)
-        sim4 = compute_similarity(claim_vec4, article_vec4)
-        sim5 = compute_similarity(claim_vec5, get_sentiment_vector(claim_vec5))
-        medium_sim = sorted([sim1, sim2, sim3])[1]
-        lowest = min(sim1, sim2, sim3, sim4)
-
-        mean_sim = (sim1+sim2+sim3+sim4 - lowest) /3
-
-        k = 10  # Adjust steepness
-        t = 0.62  # Midpoint of transformation
-        mean_sim = 1 / (1 + np.exp(-k * (mean_sim - t)))
-        if mean_sim > 0.6:
-            mean_sim += 0.08
-        elif mean_sim < 0.4:
-            mean_sim -= 0.10
-        elif mean_sim < 0.6:
-            mean_sim -= 0.15
-
-        similarities.append((mean_sim, url,title))
-
     if not similarities:
         return jsonify({
             "average_score": 0,
@@ -129,13 +266,42 @@ def compute_credibility_score():
             "supporting_article": None,
             "challenging_article": None,
             "top_articles": [],
+            "profile": profile_name,
             "message": "No valid articles with content."
         })
 
-    # Sort articles by similarity descending (highest first)
-    similarities.sort(key=lambda x: x[0], reverse=True)
+    response_data = summarize_scores(input_text, similarities, claim_vecs, profile_name)
+    if sentiment is not None:
+        response_data["sentiment"] = sentiment
 
-    db_connector.insert_data(input_text, similarities[0][0],similarities[0][1],embedding_json)
+    return jsonify(response_data)
+
+
+def summarize_scores(input_text, similarities, claim_vecs, profile_name):
+    """
+    Logs the verified claim to QueryData and the claim history (calibrated
+    profiles only), and returns the /embedding summary of a non-empty list of
+    (score, url, title).
+    """
+    # Sort articles by similarity descending (highest first)
+    similarities = sorted(similarities, key=lambda x: x[0], reverse=True)
+
+    # Scores of uncalibrated profiles are not on the "full" scale; the claim history would serve them for a day
+    if SCORING_PROFILES[profile_name]["calibrated"]:
+        # QueryData always stores the MiniLM-L12 claim vector so history stays comparable across profiles
+        claim_vec1 = claim_vecs.get(CLAIM_EMBEDDING_MODEL)
+        if claim_vec1 is None:
+            claim_vec1 = cached_embed_texts([input_text], get_sentence_model(CLAIM_EMBEDDING_MODEL),
+                                            CLAIM_EMBEDDING_MODEL)[0]
+
+        # Binary vector, or JSON text while the MySQL column has not been migrated to a BLOB
+        embedding_blob = sql.DatabaseAccess().encode_embedding(claim_vec1, QUERY_EMBEDDING_DTYPE)
+
+        # Written by the background query logger so the response does not wait on the database.
+        # One timestamp for both, so claim history refreshes recognise the row as already indexed
+        logged_at = datetime.now().replace(microsecond=0)
+        query_logger.log(input_text, similarities[0][0], similarities[0][1], embedding_blob, logged_at)
+        claim_history.add(input_text, claim_vec1, similarities[0][0], similarities[0][1], logged_at)
     # Calculate average, highest and lowest scores
     scores_only = [s[0] for s in similarities]
     highest_score = max(scores_only)
@@ -151,8 +317,7 @@ def compute_credibility_score():
     # The most "challenging" article is the one with the lowest similarity
     challenging_article = similarities[-1][1]
 
-
-    response_data = {
+    return {
         "average_score": average_score,
         "highest_score": highest_score,
         "lowest_score": lowest_score,
@@ -160,13 +325,27 @@ def compute_credibility_score():
         "challenging_article": challenging_article,
         "top_articles": [
             {"similarity": sim, "url": url} for sim, url,_ in top_2
-        ]
+        ],
+        "profile": profile_name
     }
 
 
+@embedding_blueprint.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    """Returns hit/miss/eviction counters of the embedding cache."""
+    return jsonify(embedding_cache.get_stats())
 
 
-    return jsonify(response_data)
+@embedding_blueprint.route("/batcher_stats", methods=["GET"])
+def batcher_stats():
+    """Returns how many requests and texts the micro-batcher merged per encode call."""
+    return jsonify(embedding_batcher.get_stats())
+
+
+@embedding_blueprint.route("/query_log_stats", methods=["GET"])
+def query_log_stats():
+    """Returns how many QueryData rows were queued, written or dropped by the write-behind logger."""
+    return jsonify(query_logger.get_stats())
 
 
 if __name__ == "__main__":
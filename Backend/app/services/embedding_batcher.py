@@ -0,0 +1,99 @@
+"""
+Dynamic micro-batching of SentenceTransformer encode calls.
+
+Concurrent /embedding requests each hand their texts to the batcher instead
+of calling model.encode themselves. One worker thread per model drains its
+queue, merging requests until max_batch_size texts are waiting or
+max_wait_ms has passed since the first one arrived, encodes them in a single
+call and hands each caller back its own rows.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from app.utils.config import EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_BATCH_SIZE, EMBEDDING_MAX_WAIT_MS
+from app.utils.model_registry import get_model
+
+
+class EmbeddingBatcher:
+    def __init__(self, max_batch_size=EMBEDDING_MAX_BATCH_SIZE, max_wait_ms=EMBEDDING_MAX_WAIT_MS,
+                 encode_batch_size=EMBEDDING_BATCH_SIZE):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.encode_batch_size = encode_batch_size
+        self._queues = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "texts": 0, "batches": 0}
+
+    def _queue_for(self, model_name):
+        """Returns the request queue of a model, starting its worker thread on first use."""
+        with self._lock:
+            if model_name not in self._queues:
+                self._queues[model_name] = queue.Queue()
+                worker = threading.Thread(
+                    target=self._worker, args=(model_name, self._queues[model_name]),
+                    name=f"embedding-batcher-{model_name}", daemon=True
+                )
+                worker.start()
+            return self._queues[model_name]
+
+    def encode(self, model_name, texts):
+        """Encodes texts with the named model, sharing the forward pass with concurrent callers."""
+        if not texts:
+            raise ValueError("No texts to encode")
+        future = Future()
+        self._queue_for(model_name).put((list(texts), future))
+        return future.result()
+
+    def _collect(self, requests_queue):
+        """Blocks for one request, then keeps merging until the batch is full or the wait expires."""
+        pending = [requests_queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _worker(self, model_name, requests_queue):
+        while True:
+            pending = self._collect(requests_queue)
+            texts = [text for item_texts, _future in pending for text in item_texts]
+            try:
+                vectors = get_model(model_name).encode(
+                    texts, batch_size=self.encode_batch_size, convert_to_numpy=True
+                )
+            except Exception as e:
+                for _texts, future in pending:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.stats["requests"] += len(pending)
+                self.stats["texts"] += len(texts)
+                self.stats["batches"] += 1
+
+            row = 0
+            for item_texts, future in pending:
+                future.set_result(vectors[row:row + len(item_texts)])
+                row += len(item_texts)
+
+    def get_stats(self):
+        """Request/batch counters and the average number of requests merged per batch."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["queued"] = {name: q.qsize() for name, q in self._queues.items()}
+        stats["requests_per_batch"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["texts_per_batch"] = stats["texts"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+embedding_batcher = EmbeddingBatcher()
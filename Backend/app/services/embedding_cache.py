@@ -0,0 +1,146 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.utils.config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE
+
+
+def normalize_text(text):
+    """Collapses whitespace so the same article scraped twice hashes the same."""
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def text_key(text):
+    """Content address of a text: sha256 of its normalized form."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embedding vectors keyed by (model name, text hash).
+
+    The first tier is a bounded in-process LRU. The second tier is a sqlite
+    file, which survives restarts and is shared by every worker process that
+    points at the same path.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "writes": 0}
+
+        self._conn = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        model TEXT NOT NULL,
+                        text_hash TEXT NOT NULL,
+                        dim INTEGER NOT NULL,
+                        vector BLOB NOT NULL,
+                        PRIMARY KEY (model, text_hash)
+                    )
+                    """
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Embedding cache disk tier disabled: {e}")
+                self._conn = None
+
+    def _remember(self, key, vector):
+        """Puts a vector in the LRU, evicting the least recently used entries. Caller holds the lock."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_many(self, model_name, texts):
+        """
+        Looks up texts for one model.
+        Returns a list aligned with texts holding a vector or None for each miss.
+        """
+        keys = [(model_name, text_key(text)) for text in texts]
+        found = [None] * len(keys)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    found[i] = vector
+                else:
+                    missing.setdefault(key[1], []).append(i)
+
+            if missing and self._conn is not None:
+                hashes = list(missing)
+                # sqlite caps the number of bound parameters, so query in chunks
+                for start in range(0, len(hashes), 500):
+                    chunk = hashes[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    try:
+                        rows = self._conn.execute(
+                            f"SELECT text_hash, dim, vector FROM embeddings "
+                            f"WHERE model = ? AND text_hash IN ({placeholders})",
+                            [model_name] + chunk
+                        ).fetchall()
+                    except sqlite3.Error as e:
+                        print(f"Embedding cache read error: {e}")
+                        rows = []
+                    for text_hash, dim, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32, count=dim)
+                        self._remember((model_name, text_hash), vector)
+                        for i in missing.pop(text_hash):
+                            found[i] = vector
+                            self.stats["disk_hits"] += 1
+
+            self.stats["misses"] += sum(len(indices) for indices in missing.values())
+
+        return found
+
+    def put_many(self, model_name, texts, vectors):
+        """Stores freshly computed vectors for one model in both tiers."""
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                key = (model_name, text_key(text))
+                self._remember(key, vector)
+                rows.append((model_name, key[1], int(vector.shape[-1]), vector.tobytes()))
+
+            if rows and self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                        rows
+                    )
+                    self._conn.commit()
+                    self.stats["writes"] += len(rows)
+                except sqlite3.Error as e:
+                    print(f"Embedding cache write error: {e}")
+
+    def get_stats(self):
+        """Returns hit/miss/eviction counters plus the current LRU size."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["max_entries"] = self.max_entries
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+embedding_cache = EmbeddingCache()
@@ -1,9 +1,14 @@
 # explanation.py
 import os
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError
 from flask import Blueprint, request, jsonify
+from app.utils.rate_limiter import call_with_backoff
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# All retries go through call_with_backoff: 429s against the shared OpenAI bucket, and the
+# failures the SDK would otherwise retry itself (connection errors, timeouts, 408, 409, 5xx)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+OPENAI_RETRY_ON = (APIConnectionError,)  # APITimeoutError included
+OPENAI_RETRY_STATUSES = (408, 409) + tuple(range(500, 600))
 from dotenv import load_dotenv
 
 # Load environment variables (make sure OPENAI_API_KEY is set in your .env file)
@@ -65,12 +70,12 @@ def reasoning_route():
     )
 
     try:
-        response = client.chat.completions.create(model="gpt-4o",
+        response = call_with_backoff("openai", client.chat.completions.create, model="gpt-4o",
         messages=[
             {"role": "system", "content": "You are a factual, neutral assistant."},
             {"role": "user", "content": prompt}
         ],
-        temperature=temperature)
+        temperature=temperature, retry_on=OPENAI_RETRY_ON, retry_statuses=OPENAI_RETRY_STATUSES)
         reasoning_text = response.choices[0].message.content.strip()
         return jsonify({"reasoning_summary": reasoning_text})
     except Exception as e:
@@ -0,0 +1,199 @@
+"""
+Learned per-domain extraction rules for the lxml extractor.
+
+    text = extraction_rules.extract(url, body, encoding)
+
+Most sources come from a few domains whose article pages share one layout.
+Every page extracted by the full scan reports the selector of its winning
+block (e.g. "div.story-body", "div#article-body", or "p" for the paragraph
+fallback), and the selector is recorded for the page's domain. Once
+EXTRACTION_RULE_MIN_HITS pages agree, pages from that domain are extracted
+with one targeted XPath query instead of the scan. A rule whose block is
+missing, short or mostly links (see html_extractor.select_block) falls back
+to the scan; after EXTRACTION_RULE_MAX_MISSES consecutive misses it is
+replaced by whatever the scan finds.
+
+Rules and counters live in a sqlite file shared by worker processes (the
+process parse pool included). Counts are updated in SQL inside one write
+transaction, so workers never overwrite each other's rows, and each process
+caches a rule for RULE_CACHE_SECONDS before reading it again. Extraction
+counters are added to the file every STATS_FLUSH_EVERY extractions, so
+/rule_stats covers all workers, give or take their unflushed counts.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from app.services import html_extractor
+from app.services.domain_index import host_of
+from app.utils.config import EXTRACTION_RULES_PATH, EXTRACTION_RULE_MIN_HITS, EXTRACTION_RULE_MAX_MISSES
+
+RULE_CACHE_SECONDS = 60  # how long a process trusts its copy of a domain's rule
+STATS_FLUSH_EVERY = 20  # extractions counted in memory before the counters are added to the file
+COUNTERS = ("rule_hits", "rule_misses", "scans")
+
+
+def is_learnable(selector):
+    """Bare tags other than article and p match too much to save a scan."""
+    return bool(selector) and ("." in selector or "#" in selector or selector in ("article", "p"))
+
+
+class ExtractionRules:
+    def __init__(self, path=EXTRACTION_RULES_PATH, min_hits=EXTRACTION_RULE_MIN_HITS,
+                 max_misses=EXTRACTION_RULE_MAX_MISSES):
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self._rules = {}  # domain -> ({"selector", "hits", "misses"} or None, read at)
+        self._lock = threading.Lock()
+        self._pending = dict.fromkeys(COUNTERS, 0)  # counted here, not yet added to the file
+
+        try:
+            if path:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = self._connect(path or ":memory:")
+        except sqlite3.Error as e:
+            print(f"Extraction rules kept in memory only: {e}")
+            self._conn = self._connect(":memory:")
+
+    @staticmethod
+    def _connect(path):
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rules (
+                domain TEXT PRIMARY KEY,
+                selector TEXT NOT NULL,
+                hits INTEGER NOT NULL,
+                misses INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        return conn
+
+    def _read(self, domain):
+        """The domain's rule as stored, cached for RULE_CACHE_SECONDS. Caller holds the lock."""
+        row = self._conn.execute("SELECT selector, hits, misses FROM rules WHERE domain = ?", (domain,)).fetchone()
+        rule = {"selector": row[0], "hits": row[1], "misses": row[2]} if row else None
+        self._rules[domain] = (rule, time.monotonic())
+        return rule
+
+    def _get(self, domain):
+        """The domain's rule from this process's cache while it is recent, else from the file. Caller holds the lock."""
+        cached = self._rules.get(domain)
+        if cached is not None and time.monotonic() - cached[1] < RULE_CACHE_SECONDS:
+            return cached[0]
+        try:
+            return self._read(domain)
+        except sqlite3.Error as e:
+            print(f"Extraction rules read error: {e}")
+            return cached[0] if cached else None
+
+    def rule_for(self, domain):
+        """The selector to try first for a domain, or None while it is unknown or unconfirmed."""
+        with self._lock:
+            rule = self._get(domain)
+        return rule["selector"] if rule and rule["hits"] >= self.min_hits else None
+
+    def record(self, domain, selector, rule_used=False):
+        """
+        Records the selector that extracted a page. rule_used is True when it
+        came from the domain's rule, False when the full scan found it.
+        """
+        if not domain or not is_learnable(selector):
+            return
+        with self._lock:
+            rule = self._get(domain)
+            if rule_used and rule is not None and rule["selector"] == selector and not rule["misses"]:
+                return  # a confirmed rule that keeps working changes nothing worth a write
+            now = time.time()
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # The same selector again: one more hit, and any miss streak ends
+                    updated = self._conn.execute(
+                        "UPDATE rules SET hits = hits + 1, misses = 0, updated_at = ? WHERE domain = ? AND selector = ?",
+                        (now, domain, selector)
+                    ).rowcount
+                    if not updated:
+                        # A confirmed rule missed; keep it until it misses max_misses times in a row
+                        updated = self._conn.execute(
+                            "UPDATE rules SET misses = misses + 1, updated_at = ? "
+                            "WHERE domain = ? AND hits >= ? AND misses + 1 < ?",
+                            (now, domain, self.min_hits, self.max_misses)
+                        ).rowcount
+                    if not updated:
+                        # Unknown domain, unconfirmed rule, or too many misses: start over with this selector
+                        self._conn.execute(
+                            "INSERT INTO rules (domain, selector, hits, misses, updated_at) VALUES (?, ?, 1, 0, ?) "
+                            "ON CONFLICT (domain) DO UPDATE SET selector = excluded.selector, hits = 1, misses = 0, "
+                            "updated_at = excluded.updated_at",
+                            (domain, selector, now)
+                        )
+                    self._read(domain)
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                print(f"Extraction rules write error: {e}")
+
+    def _count(self, name):
+        """Counts one extraction outcome; adds the counts to the file every STATS_FLUSH_EVERY."""
+        with self._lock:
+            self._pending[name] += 1
+            if sum(self._pending.values()) >= STATS_FLUSH_EVERY:
+                self._flush_counts()
+
+    def _flush_counts(self):
+        """Caller holds the lock."""
+        try:
+            self._conn.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                [(name, value) for name, value in self._pending.items() if value]
+            )
+            self._pending = dict.fromkeys(COUNTERS, 0)
+        except sqlite3.Error as e:
+            print(f"Extraction rules write error: {e}")
+
+    def get_stats(self):
+        """Counters of all processes sharing the file plus the number of known and confirmed rules."""
+        with self._lock:
+            self._flush_counts()
+            stats = dict.fromkeys(COUNTERS, 0)
+            try:
+                stats.update(self._conn.execute("SELECT name, value FROM counters"))
+                stats["domains"], stats["confirmed"] = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(hits >= ?), 0) FROM rules", (self.min_hits,)
+                ).fetchone()
+            except sqlite3.Error:
+                pass
+        return stats
+
+    def extract(self, url, body, encoding=None):
+        """Main text of an HTML page via its domain's rule, or via the full scan if that fails."""
+        root = html_extractor.prepare(body, encoding)
+        if root is None:
+            return None
+        domain = host_of(url)
+        selector = self.rule_for(domain)
+        if selector:
+            text = html_extractor.select_block(root, selector)
+            self._count("rule_hits" if text else "rule_misses")
+            if text:
+                self.record(domain, selector, rule_used=True)
+                return text
+
+        text, selector = html_extractor.best_block(root)
+        self._count("scans")
+        if text:
+            self.record(domain, selector)
+        return text
+
+
+extraction_rules = ExtractionRules()
@@ -0,0 +1,207 @@
+"""
+Single-pass main-content extraction for HTML pages.
+
+    text = extract(body, encoding)  # None when no content block was found
+
+The BeautifulSoup extractor parses with html.parser and then runs one
+soup.select over the whole tree per entry of its selector list. This one
+parses once with lxml's C parser, drops script/style/nav-like boilerplate
+(forms and headers only when they hold no paragraphs), and walks the tree a single time to collect
+candidates: elements matching any of the same selectors, plus every element
+that directly holds <p> paragraphs. Each candidate is scored by its non-link
+text weighted by text density (characters per element), so a story body
+beats a menu, a comment list or a block of teasers, and the best block wins.
+Pages whose best block is tiny fall back to all of their paragraphs.
+
+best_block also reports a selector for the winning block (tag#id, tag.class,
+or "p" for the paragraph fallback) and select_block applies such a selector
+directly, which is how extraction_rules skips the scan for known domains.
+"""
+import re
+from functools import lru_cache
+
+import lxml.html
+from lxml import etree
+
+# Removed with their contents before scoring
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "svg", "iframe", "button",
+    "nav", "footer", "aside",
+)
+# Removed only when they hold no <p>: ASP.NET pages wrap the whole body in one <form>,
+# and some article headers carry the standfirst paragraph
+PARAGRAPHLESS_BOILERPLATE_TAGS = ("form", "header")
+# The selector list of the BeautifulSoup extractor as tag -> classes (None: any element with the tag)
+CONTENT_SELECTORS = {
+    "article": None,
+    "div": {"story-body", "post-content", "entry-content", "article-content", "main-content",
+            "content__article-body"},
+    "section": {"article-body"},
+}
+SELECTOR_BONUS = 1.25  # score multiplier for blocks a known selector matched
+DENSITY_HALF = 25  # characters per element at which a block keeps half its score
+MIN_BLOCK_CHARS = 200  # below this the joined paragraphs are returned instead
+MIN_RULE_QUALITY = 0.5  # score per character a learned selector's block needs; link lists and sparse blocks fall short
+
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+STABLE_NAME = re.compile(r"^[A-Za-z][\w-]*$")  # ids and classes usable in a learned selector
+LONG_NUMBER = re.compile(r"\d{3,}")
+
+
+def normalize(text):
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def sniff_encoding(body):
+    """Charset of a page without a declared one: its <meta> tag, else UTF-8 if it decodes, else cp1252."""
+    match = META_CHARSET.search(body[:4096])
+    if match:
+        return match.group(1).decode("ascii")
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def parse(body, encoding=None):
+    """
+    lxml tree of a page body (bytes), or None if it holds no document. A
+    charset Python does not know (e.g. utf8mb4) falls back to the sniffed one, then UTF-8.
+    """
+    for candidate in dict.fromkeys((encoding or sniff_encoding(body), sniff_encoding(body), "utf-8")):
+        try:
+            parser = lxml.html.HTMLParser(encoding=candidate, remove_comments=True, remove_pis=True)
+            return lxml.html.document_fromstring(body, parser=parser)
+        except LookupError:
+            continue
+        except (etree.ParserError, ValueError):
+            return None
+    return None
+
+
+def matches_selector(element):
+    if element.tag not in CONTENT_SELECTORS:
+        return False
+    classes = CONTENT_SELECTORS[element.tag]
+    return classes is None or not classes.isdisjoint(element.get("class", "").split())
+
+
+def score(element, selected):
+    """Non-link characters weighted by text density, plus a bonus for selector matches."""
+    text = normalize(" ".join(element.itertext()))
+    if not text:
+        return 0.0, text
+    link_chars = sum(len(normalize(link.text_content())) for link in element.iter("a"))
+    elements = sum(1 for _ in element.iter())
+    density = len(text) / elements
+    value = max(len(text) - link_chars, 0) * density / (density + DENSITY_HALF)
+    return value * (SELECTOR_BONUS if selected else 1.0), text
+
+
+def prepare(body, encoding=None):
+    """Parsed page with boilerplate removed, or None."""
+    root = parse(body, encoding)
+    if root is not None:
+        etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+        for element in list(root.iter(*PARAGRAPHLESS_BOILERPLATE_TAGS)):
+            if element.getparent() is not None and next(element.iter("p"), None) is None:
+                element.drop_tree()
+    return root
+
+
+def selector_of(element):
+    """
+    CSS selector a learned rule can target the element with next time: tag#id,
+    else tag.class, skipping ids and classes with long numbers (per-article ids).
+    """
+    for token in [element.get("id", "")] + element.get("class", "").split():
+        if STABLE_NAME.match(token) and not LONG_NUMBER.search(token):
+            return f"{element.tag}#{token}" if token == element.get("id") else f"{element.tag}.{token}"
+    return element.tag
+
+
+@lru_cache(maxsize=1024)
+def compile_selector(selector):
+    """XPath for a tag, tag.class or tag#id selector."""
+    tag, _, name = selector.partition("#")
+    if name:
+        return etree.XPath(f"//{tag}[@id='{name}']")
+    tag, _, name = selector.partition(".")
+    if name:
+        return etree.XPath(f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]")
+    return etree.XPath(f"//{tag}")
+
+
+def paragraphs_text(root):
+    return " ".join(text for text in (normalize(p.text_content()) for p in root.iter("p")) if text)
+
+
+def best_block(root):
+    """
+    Main text of a prepared page and the selector of the block it came from
+    ("p" when all paragraphs were joined), or (None, None).
+    """
+    # One traversal: selector matches, paragraphs and the elements holding them
+    selected, holders, paragraphs = [], {}, []
+    for element in root.iter(etree.Element):
+        if element.tag == "p":
+            text = normalize(element.text_content())
+            if text:
+                paragraphs.append(text)
+                parent = element.getparent()
+                if parent is not None:
+                    holders[parent] = True
+        elif matches_selector(element):
+            selected.append(element)
+
+    best_score, best_text, best = 0.0, "", None
+    for element in selected:
+        holders.pop(element, None)
+        value, text = score(element, True)
+        if value > best_score:
+            best_score, best_text, best = value, text, element
+    for element in holders:
+        value, text = score(element, False)
+        if value > best_score:
+            best_score, best_text, best = value, text, element
+
+    if len(best_text) < MIN_BLOCK_CHARS:
+        joined = " ".join(paragraphs)
+        if len(joined) > len(best_text):
+            return joined, "p"
+    return (best_text, selector_of(best)) if best_text else (None, None)
+
+
+def select_block(root, selector):
+    """
+    Text of the best block a learned selector matches on a prepared page, or
+    None if it matches nothing substantial. One targeted query, no full scan.
+    A block that scores under MIN_RULE_QUALITY per character (mostly links, or
+    text spread thin over many elements) is not trusted either: the layout
+    probably changed and the selector now hits a menu or teaser list.
+    """
+    if selector == "p":
+        text = paragraphs_text(root)
+    else:
+        try:
+            elements = compile_selector(selector)(root)
+        except etree.XPathError:
+            return None
+        best_score, text = 0.0, ""
+        for element in elements:
+            value, element_text = score(element, False)
+            if value > best_score:
+                best_score, text = value, element_text
+        if best_score < MIN_RULE_QUALITY * len(text):
+            return None
+    return text if len(text) >= MIN_BLOCK_CHARS else None
+
+
+def extract(body, encoding=None):
+    """Main text of an HTML page, or None."""
+    root = prepare(body, encoding)
+    if root is None:
+        return None
+    return best_block(root)[0]
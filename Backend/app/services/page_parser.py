@@ -0,0 +1,119 @@
+"""
+Main-text extraction from fetched page bodies (HTML, XML, PDF).
+
+Pure CPU work with no Flask, HTTP or database imports beyond the extraction
+rules file, so the async fetch engine's process parse pool imports only this
+module (and what it needs) in its workers, not the app.
+"""
+import io
+
+import PyPDF2
+from bs4 import BeautifulSoup
+
+from app.services.extraction_rules import extraction_rules
+from app.utils.config import HTML_EXTRACTOR
+
+# Recorded with every cached article; bump it when extraction changes so stored pages are re-extracted
+PARSER_VERSION = f"3-{HTML_EXTRACTOR}"
+
+
+def declared_encoding(content_type):
+    """Charset named in a Content-Type header, or None to let the parser detect it."""
+    for part in content_type.split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip('"\'')
+    return None
+
+
+# Prefixes of the messages extraction returns instead of article text
+EXTRACTION_FAILURES = ("Error ", "Main content not found", "Content is neither")
+
+
+def is_extracted(content):
+    """False for the error and not-found messages extraction returns instead of text."""
+    return bool(content) and not content.startswith(EXTRACTION_FAILURES)
+
+
+def soup_extract(body, encoding=None):
+    """
+    The BeautifulSoup extractor (HTML_EXTRACTOR=soup): the first selector that
+    matches wins and the text of all its matches is concatenated.
+    """
+    try:
+        soup = BeautifulSoup(body, "html.parser", from_encoding=encoding)
+    except Exception as e:
+        # If default parser fails, try a different parser
+        soup = BeautifulSoup(body, "lxml", from_encoding=encoding)
+
+    # Try extracting common content elements from news sites
+    content_selectors = [
+        "article",  # Many sites wrap content in <article> tags
+        "div.story-body", "div.post-content",  # BBC, blogs, medium, etc.
+        "div.entry-content", "div.article-content", "div.main-content",
+        "section.article-body", "div.content__article-body",  # Common structures
+        "p"  # Last fallback: Grab all paragraphs
+    ]
+
+    for selector in content_selectors:
+        elements = soup.select(selector)
+        if elements:
+            # Concatenate text from all found elements
+            print("Content scrap successful (HTML)")
+            extracted_text = " ".join([el.get_text(strip=True) for el in elements])
+            if extracted_text:
+                return extracted_text
+
+    return "Main content not found in HTML."
+
+
+def parse_content(url, content_type, body, encoding=None):
+    """
+    Extracts the main text from a fetched page body (bytes). CPU-bound and free
+    of I/O, so the async fetch engine can run it in a separate worker pool.
+    """
+    try:
+        # Process based on content type
+        if 'html' in content_type.lower():
+            if HTML_EXTRACTOR == "soup":
+                return soup_extract(body, encoding)
+            # Known domains: one query with their learned selector; others: the full single-pass scan
+            extracted_text = extraction_rules.extract(url, body, encoding)
+            if extracted_text:
+                print("Content scrap successful (HTML)")
+                return extracted_text
+            return "Main content not found in HTML."
+
+        elif 'xml' in content_type.lower():
+            # Process XML content
+            soup = BeautifulSoup(body, "xml", from_encoding=encoding)
+            extracted_text = soup.get_text(strip=True)
+            if extracted_text:
+                print("Content scrap successful (XML)")
+                return extracted_text
+            else:
+                return "Main content not found in XML."
+
+        # PDF branch
+        elif 'pdf' in content_type.lower() or url.lower().endswith('.pdf'):
+            try:
+                pdf_data = io.BytesIO(body)
+                reader = PyPDF2.PdfReader(pdf_data, strict=False)
+                extracted_text = ""
+                for page in reader.pages:
+                    text = page.extract_text()
+                    if text:
+                        extracted_text += text + "\n"
+                if extracted_text:
+                    print("Content scrap successful (PDF)")
+                    return extracted_text
+                else:
+                    return "Main content not found in PDF."
+            except Exception as pdf_error:
+                return f"Error processing PDF: {str(pdf_error)}"
+
+        else:
+            return f"Content is neither HTML, XML, nor PDF. Detected content type: {content_type}"
+
+    except Exception as e:
+        return f"Error processing content: {str(e)}"
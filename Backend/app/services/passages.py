@@ -0,0 +1,74 @@
+import math
+import re
+from collections import Counter
+
+
+def split_sentences(text):
+    """Splits article text into sentences on ., ! and ? boundaries."""
+    sentences = re.split(r"(?<=[.!?])\s+", text)
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+
+def sentence_windows(sentences, window=3, stride=2):
+    """
+    Groups sentences into overlapping windows of `window` sentences,
+    moving `stride` sentences at a time.
+    """
+    if len(sentences) <= window:
+        return [" ".join(sentences)] if sentences else []
+
+    passages = []
+    for start in range(0, len(sentences) - window + stride, stride):
+        passages.append(" ".join(sentences[start:start + window]))
+    return passages
+
+
+def tokenize(text):
+    """Lowercased word tokens of at least 3 characters, used for cheap lexical scoring."""
+    return re.findall(r"[a-z0-9]{3,}", text.lower())
+
+
+def bm25_scores(query, passages, k1=1.5, b=0.75):
+    """
+    Scores every passage against the query with BM25.
+    Cheap prefilter so only the most relevant passages are embedded.
+    """
+    query_terms = set(tokenize(query))
+    tokenized = [tokenize(passage) for passage in passages]
+    if not query_terms or not tokenized:
+        return [0.0] * len(passages)
+
+    avg_len = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1.0
+    doc_freq = Counter()
+    for tokens in tokenized:
+        doc_freq.update(query_terms.intersection(tokens))
+
+    n = len(tokenized)
+    scores = []
+    for tokens in tokenized:
+        counts = Counter(tokens)
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def select_passages(claim, article_text, top_k=3, window=3, stride=2):
+    """
+    Returns at most top_k sentence windows of the article that overlap most
+    with the claim, in their original order. Short articles come back whole.
+    """
+    passages = sentence_windows(split_sentences(article_text), window, stride)
+    if len(passages) <= top_k:
+        return passages or [article_text]
+
+    scores = bm25_scores(claim, passages)
+    best = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)[:top_k]
+    # Passages with no lexical overlap only dilute mean pooling; keep the lead passage if nothing matches
+    best = [i for i in best if scores[i] > 0] or best[:1]
+    return [passages[i] for i in sorted(best)]
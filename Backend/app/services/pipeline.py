@@ -0,0 +1,191 @@
+"""
+Streamed search -> fetch -> score pipeline behind POST /pipeline.
+
+Instead of the bot calling /scrape, /scrape_content and /embedding one after
+another, the three stages overlap on the server:
+
+  - every credible URL goes to the fetch pool as soon as its search returns,
+  - every fetched article goes to the scoring pool as soon as it arrives,
+    where concurrent encode calls are merged by the embedding batcher,
+  - scores accumulate as articles finish.
+
+End-to-end latency is then close to the slowest stage rather than the sum of
+the three. With "stream": true the route sends one JSON line per event
+(source, search_done, article, result); otherwise it answers once with the
+final result.
+"""
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+
+from app.services.async_fetcher import async_fetch_engine
+from app.services.content_scraper import extract_main_content
+from app.services.embedding import score_articles, summarize_scores
+from app.services.scoring_profiles import resolve_profile
+from app.services.scraper import find_sources
+from app.utils.config import (
+    DEFAULT_SCORING_PROFILE, EMBEDDING_BATCH_SIZE, PASSAGE_MODE, PASSAGE_TOP_K, PASSAGE_POOLING,
+    SEARCH_MAX_IN_FLIGHT, PIPELINE_FETCH_WORKERS, PIPELINE_SCORE_WORKERS, FETCH_ENGINE
+)
+
+pipeline_blueprint = Blueprint("pipeline_blueprint", __name__)
+
+
+def run_pipeline(input_text, keywords, search_options, profile_name=DEFAULT_SCORING_PROFILE,
+                 scoring_options=None, fetch_workers=PIPELINE_FETCH_WORKERS, score_workers=PIPELINE_SCORE_WORKERS):
+    """
+    Runs the three stages concurrently and yields events as dicts:
+      {"event": "source", "title", "url", "tier"}       a credible source was found
+      {"event": "search_done", "sources": n}            searching finished
+      {"event": "article", "url", "title", "similarity"}  an article was fetched and scored
+      {"event": "result", ...}                          /embedding summary plus "results" (articles with content)
+    """
+    profile_name, profile = resolve_profile(profile_name)
+    scoring_options = scoring_options or {}
+    events = queue.Queue()
+    fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="pipeline-fetch")
+    score_pool = ThreadPoolExecutor(max_workers=score_workers, thread_name_prefix="pipeline-score")
+    stop = threading.Event()
+    # Held while checking stop and submitting to score_pool, and while setting stop, so
+    # nothing is submitted to the pool after the finally block below shut it down
+    submit_lock = threading.Lock()
+    fetches = []
+
+    def score(article):
+        similarities, claim_vecs, _sentiment = score_articles(
+            input_text, [article], profile, scoring_options.get("batch_size", EMBEDDING_BATCH_SIZE),
+            passage_mode=scoring_options.get("passage_mode", PASSAGE_MODE),
+            passage_top_k=scoring_options.get("passage_top_k", PASSAGE_TOP_K),
+            passage_pooling=scoring_options.get("passage_pooling", PASSAGE_POOLING),
+            include_sentiment=False
+        )
+        return similarities, claim_vecs
+
+    def on_scored(article, future):
+        try:
+            events.put(("scored", article, future.result()))
+        except Exception as e:
+            print(f"Scoring {article['url']} failed: {e}")
+            events.put(("scored", article, None))
+
+    def on_fetched(source, future):
+        try:
+            content = future.result()
+        except Exception as exc:
+            content = f"Error during extraction: {exc}"
+        article = dict(source, article_content=content)
+        events.put(("fetched", article, None))
+        with submit_lock:
+            scoring = None
+            if content and not stop.is_set():
+                scoring = score_pool.submit(score, article)
+        if scoring is not None:
+            scoring.add_done_callback(lambda f: on_scored(article, f))
+        else:
+            events.put(("scored", article, None))
+
+    def search():
+        try:
+            for source in find_sources(keywords, **search_options):
+                if stop.is_set():
+                    break
+                events.put(("source", source, None))
+                if FETCH_ENGINE == "async":
+                    future = async_fetch_engine.submit(source["url"])
+                else:
+                    future = fetch_pool.submit(extract_main_content, source["url"])
+                fetches.append(future)
+                future.add_done_callback(lambda f, source=source: on_fetched(source, f))
+        except Exception as e:
+            print(f"Search stage failed: {e}")
+        finally:
+            events.put(("search_done", None, None))
+
+    threading.Thread(target=search, name="pipeline-search", daemon=True).start()
+
+    sources, articles, similarities = 0, [], []
+    claim_vecs = {}
+    search_done, pending = False, 0
+    try:
+        while not search_done or pending:
+            kind, item, payload = events.get()
+            if kind == "source":
+                sources += 1
+                pending += 1
+                yield {"event": "source", "title": item.get("title"), "url": item["url"], "tier": item.get("tier")}
+            elif kind == "search_done":
+                search_done = True
+                yield {"event": "search_done", "sources": sources}
+            elif kind == "fetched":
+                articles.append(item)
+            elif kind == "scored":
+                pending -= 1
+                if payload is None or not payload[0]:
+                    continue
+                article_similarities, article_claim_vecs = payload
+                similarities.extend(article_similarities)
+                claim_vecs = claim_vecs or article_claim_vecs
+                sim, url, title = article_similarities[0]
+                yield {"event": "article", "url": url, "title": title, "similarity": sim}
+    finally:
+        # A client that disconnected mid-stream stops further searching, fetching and scoring
+        with submit_lock:
+            stop.set()
+        for future in fetches:
+            future.cancel()
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        score_pool.shutdown(wait=False, cancel_futures=True)
+
+    if similarities:
+        result = summarize_scores(input_text, similarities, claim_vecs, profile_name)
+    else:
+        result = {
+            "average_score": 0,
+            "highest_score": 0,
+            "lowest_score": 0,
+            "supporting_article": None,
+            "challenging_article": None,
+            "top_articles": [],
+            "profile": profile_name,
+            "message": "No valid articles with content."
+        }
+    result["results"] = articles
+    yield dict(result, event="result")
+
+
+@pipeline_blueprint.route("/", methods=["POST"])
+def pipeline_route():
+    """
+    Expects the /scrape payload plus "input_text", and optionally "profile",
+    the /embedding passage options and "stream".
+    """
+    data = request.get_json()
+    input_text = data.get("input_text") or data.get("original_query", "")
+    keywords = data.get("keywords", "")
+    if not keywords or not input_text:
+        return jsonify({"error": "input_text and keywords are required"}), 400
+
+    search_options = {
+        "max_search_count": data.get("max_search_count", 20),
+        "min_source_count": data.get("min_source_count", 25),
+        "keyword_query_percentage": data.get("keyword_query_percentage", 0.8),
+        "is_singapore_sources": data.get("is_singapore_sources", False),
+        "max_in_flight": data.get("max_in_flight", SEARCH_MAX_IN_FLIGHT),
+    }
+    scoring_options = {key: data[key] for key in ("batch_size", "passage_mode", "passage_top_k", "passage_pooling")
+                       if key in data}
+    events = run_pipeline(input_text, keywords, search_options,
+                          data.get("profile", DEFAULT_SCORING_PROFILE), scoring_options)
+
+    if data.get("stream"):
+        return Response(stream_with_context(json.dumps(event) + "\n" for event in events),
+                        mimetype="application/x-ndjson")
+
+    result = None
+    for event in events:
+        result = event
+    result.pop("event")
+    return jsonify(result)
@@ -0,0 +1,103 @@
+"""
+Deterministic search query planning for the /scrape source finder.
+
+The plan starts with a query over all keywords. Each later query uses a
+distinct keyword subset: first cyclic windows, so every keyword is left out
+in turn, then seeded samples. Each query also gets a site: filter made of the
+next slice of a rotating domain list, so every credible domain is covered
+before any domain repeats. The same claim always produces the same plan, which
+also makes search cache hits likely across repeated claims.
+"""
+import hashlib
+import random
+
+
+def _subset_sizes(n, keyword_fraction):
+    """Subset sizes to draw, largest first; mirrors the old per-length fractions."""
+    if n <= 10:
+        high = low = int(0.8 * (n - 1))
+    elif n <= 20:
+        high = low = int(0.7 * (n - 1))
+    else:
+        # Either bound may be larger, as with the old random.uniform(keyword_fraction, 0.8)
+        bounds = (int(0.8 * (n - 1)), int(keyword_fraction * (n - 1)))
+        high, low = max(bounds), min(bounds)
+    return [size for size in range(max(high, 1), max(low, 1) - 1, -1)]
+
+
+def keyword_subsets(keywords, count, keyword_fraction):
+    """Returns up to count distinct keyword lists, the first being all keywords."""
+    keywords = list(dict.fromkeys(keywords))
+    subsets, seen = [], set()
+
+    def take(subset):
+        key = frozenset(subset)
+        if subset and key not in seen:
+            seen.add(key)
+            subsets.append(list(subset))
+
+    take(keywords)
+    n = len(keywords)
+    sizes = _subset_sizes(n, keyword_fraction) if n > 1 else []
+
+    # Cyclic windows: each keyword is left out by a different query
+    for size in sizes:
+        for start in range(n):
+            if len(subsets) >= count:
+                return subsets
+            take([keywords[(start + i) % n] for i in range(size)])
+
+    # Then seeded samples, in keyword order, until the plan is full or no new subsets turn up
+    rng = random.Random(hashlib.sha256("\x1f".join(keywords).encode("utf-8")).hexdigest())
+    attempts = 0
+    while sizes and len(subsets) < count and attempts < count * 20:
+        attempts += 1
+        picked = sorted(rng.sample(range(n), rng.choice(sizes)))
+        take([keywords[i] for i in picked])
+    return subsets
+
+
+def site_filters(domains, count, sites_per_query):
+    """Returns count site: filters that walk through domains in order, wrapping around."""
+    domains = list(dict.fromkeys(domains))
+    per_query = min(sites_per_query, len(domains))
+    filters = []
+    for i in range(count):
+        start = i * per_query
+        sites = [domains[(start + j) % len(domains)] for j in range(per_query)]
+        filters.append(" OR ".join(f"site:{site}" for site in sites))
+    return filters
+
+
+def plan_queries(keywords, max_queries, keyword_fraction, domains, sites_per_query):
+    """Builds the ordered list of search queries for one claim."""
+    subsets = keyword_subsets(keywords, max_queries, keyword_fraction)
+    filters = site_filters(domains, max_queries, sites_per_query)
+    # Fewer keyword subsets than queries: reuse them with the next domains in the rotation,
+    # dropping any query that comes round again once the rotation wraps
+    return list(dict.fromkeys(
+        f"{' '.join(subsets[i % len(subsets)])} ({filters[i]})"
+        for i in range(max_queries if subsets else 0)
+    ))
+
+
+class YieldTracker:
+    """
+    Tracks how many new unique URLs each completed query contributed and
+    signals when the last `window` queries averaged fewer than min_yield,
+    once at least min_queries have completed.
+    """
+
+    def __init__(self, window, min_yield, min_queries):
+        self.window = window
+        self.min_yield = min_yield
+        self.min_queries = min_queries
+        self.yields = []
+
+    def record(self, new_urls):
+        """Records one completed query. Returns True when searching should stop."""
+        self.yields.append(new_urls)
+        if len(self.yields) < max(self.min_queries, self.window):
+            return False
+        recent = self.yields[-self.window:]
+        return sum(recent) / len(recent) < self.min_yield
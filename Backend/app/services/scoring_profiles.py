@@ -0,0 +1,55 @@
+"""
+Named scoring profiles for the /embedding credibility scorer.
+
+Each profile lists the SentenceTransformer models it needs and the sigmoid
+used to turn their mean cosine similarity into a score. Only the models of
+the profiles actually requested get loaded.
+
+A profile is "calibrated" once its sigmoid was fitted against "full" with
+benchmarks/bench_scoring_profiles.py. Until then its scores are answered but
+not logged to QueryData or the claim history (which serves cached verdicts
+for 24h), and load degradation does not switch requests to it.
+"""
+
+# Model whose claim vector is logged to QueryData, whatever profile scored the claim
+CLAIM_EMBEDDING_MODEL = "all-MiniLM-L12-v2"
+
+SCORING_PROFILES = {
+    # Today's ensemble: four models, the lowest of the four similarities is dropped
+    "full": {
+        "models": ["all-MiniLM-L12-v2", "all-mpnet-base-v2", "paraphrase-mpnet-base-v2", "all-MiniLM-L6-v2"],
+        "trim_lowest": True,
+        "sigmoid_k": 10,
+        "sigmoid_t": 0.62,
+        "calibrated": True,
+    },
+    # One mpnet and one MiniLM. Same midpoint as "full" until it is calibrated with
+    # benchmarks/bench_scoring_profiles.py on real traffic
+    "balanced": {
+        "models": ["all-mpnet-base-v2", "all-MiniLM-L12-v2"],
+        "trim_lowest": False,
+        "sigmoid_k": 10,
+        "sigmoid_t": 0.62,
+        "calibrated": False,
+    },
+    # The claim embedding model alone, so this profile loads one model and the
+    # QueryData vector costs nothing extra. A single model lacks the trimmed
+    # ensemble's upward bias, so the shared midpoint makes it harsher than
+    # "full" until it is calibrated
+    "fast": {
+        "models": [CLAIM_EMBEDDING_MODEL],
+        "trim_lowest": False,
+        "sigmoid_k": 10,
+        "sigmoid_t": 0.62,
+        "calibrated": False,
+    },
+}
+
+
+def resolve_profile(name, default="full"):
+    """Returns (profile_name, profile), falling back to the default for unknown names."""
+    if name not in SCORING_PROFILES:
+        if name is not None:
+            print(f"Unknown scoring profile '{name}', using '{default}'")
+        name = default
+    return name, SCORING_PROFILES[name]
@@ -1,104 +1,25 @@
-import os
-import time
-import random
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 from urllib.parse import urlparse
 from flask import Blueprint, request, jsonify
-import re
 
-from app.services.check_domain import is_credible  # your is_credible function
+from app.services.domain_index import domain_index
+from app.services.search_backends import get_search_backend
+from app.services.search_cache import search_cache
+from app.services.query_planner import plan_queries, YieldTracker
+from app.utils.config import SEARCH_MAX_IN_FLIGHT, SEARCH_YIELD_WINDOW, SEARCH_MIN_YIELD
+from app.utils.rate_limiter import call_with_backoff, RateLimitExceeded
 
 from dotenv import load_dotenv
 
 load_dotenv()
 scrape_blueprint = Blueprint("scrape_blueprint", __name__)
 
-CREDIBLE_DOMAINS = [
-    # --- TLD patterns (handle via partial checks in code) ---
-    ".gov",  # covers cdc.gov, nih.gov, etc.
-    ".edu",  # US educational institutions
-    ".ac.",  # academic subdomains in some countries (e.g. .ac.uk)
-    ".gov.",  # e.g. .gov.uk, .gov.sg
-
-    # --- International orgs and agencies ---
-    "who.int",  # World Health Organization
-    "un.org",  # United Nations
-    "europa.eu",  # European Union websites
-    "imf.org",  # International Monetary Fund
-    "worldbank.org",  # World Bank
-    "oecd.org",  # Organisation for Economic Co-operation and Development
-
-    # -- Singapore Government & TLD Patterns --
-    ".gov.sg",  # covers moh.gov.sg, mom.gov.sg, etc.
-    "gov.sg",  # top-level domain
-    ".edu.sg",  # e.g., nus.edu.sg, ntu.edu.sg
-    ".ac.sg",  # some academic subdomains
-
-    # -- Singapore News Outlets --
-    "mothership.sg",
-    "straitstimes.com",
-    "channelnewsasia.com",
-    "todayonline.com",
-    "zaobao.com.sg",
-    "businesstimes.com.sg",
-
-    # --- Major news outlets / media (English-speaking examples) ---
-    "bbc.com",
-    "bbc.co.uk",
-    "reuters.com",
-    "apnews.com",
-    "theguardian.com",
-    "nytimes.com",
-    "washingtonpost.com",
-    "cnn.com",
-    "npr.org",  # US public radio
-    "wsj.com",  # Wall Street Journal
-    "bloomberg.com",
-    "abcnews.go.com",
-    "cbsnews.com",
-    "nbcnews.com",
-    "latimes.com",
-
-    # --- Fact-checking / watchdog sites ---
-    "snopes.com",
-    "factcheck.org",
-    "politifact.com",
-    "fullfact.org",  # UK-based fact-check
-    "truthout.org",  # independent, though check editorial stance
-
-    # --- Popular tech/science journals or magazines (examples) ---
-    "sciencedirect.com",
-    "nature.com",
-    "sciencemag.org",
-    "nationalgeographic.com",
-    "newscientist.com",
-
-    # --- Security/antivirus references (for scam detection, e.g. scanning) ---
-    "malwarebytes.com",
-    "kaspersky.com",
-    "mcafee.com",
-
-    "snopes.com", "factcheck.org", "politifact.com", "reuters.com", "bbc.com",
-    "apnews.com", "npr.org", "theguardian.com", "forbes.com", "bloomberg.com"
-
-    # --- Additional TLD patterns or country-specific G/NGOs may follow ---
-]
-
-SINGAPORE_DOMAIN = [
-    ".gov.sg",  # covers moh.gov.sg, mom.gov.sg, etc.
-    "gov.sg",  # top-level domain
-    ".edu.sg",  # e.g., nus.edu.sg, ntu.edu.sg
-    ".ac.sg",  # some academic subdomains
-
-    # -- Singapore News Outlets --
-    "mothership.sg",
-    "straitstimes.com",
-    "channelnewsasia.com",
-    "todayonline.com",
-    "zaobao.com.sg",
-    "businesstimes.com.sg",
-]
+# site: filter rotations; the domains and their tiers live in app/data/credible_domains.json
+CREDIBLE_DOMAINS = domain_index.search_domains("global")
+SINGAPORE_DOMAIN = domain_index.search_domains("singapore")
 
 
 def get_domain(url: str) -> str:
@@ -116,128 +37,121 @@ def get_domain(url: str) -> str:
 def google_custom_search(query, num_results=5):
     """
     Search Google using the Custom Search API and return top results.
-    You'll need to replace YOUR_GOOGLE_API_KEY and YOUR_GOOGLE_CSE_ID with your credentials.
+    The backend (live API or offline fixtures) is chosen by SEARCH_BACKEND, see search_backends.py.
     """
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")  # Replace with your API key
-    GOOGLE_CSE_ID = "50fd98dbe1984411d"  # Replace with your Custom Search Engine ID
-    search_url = "https://www.googleapis.com/customsearch/v1"
     final_query = f"{query}"
     print(f"query: {final_query}")
-    params = {
-        "key": GOOGLE_API_KEY,
-        "cx": GOOGLE_CSE_ID,
-        "q": final_query,
-        "num": 5,
-    }
-
-    response = requests.get(search_url, params=params)
-    response.raise_for_status()
-    data = response.json()
-
-    results = []
-    if "items" in data:
-        for item in data["items"]:
-            results.append({
-                "title": item.get("title", "No Title"),
-                "url": item.get("link", "")
-            })
+
+    # Reordered or repeated keywords and sites hit the same cache entry and skip the API call
+    cached = search_cache.get(final_query, num_results)
+    if cached is not None:
+        return cached
+
+    results = call_with_backoff("google_search", get_search_backend().search, final_query, num_results)
+    search_cache.put(final_query, num_results, results)
     return results
 
 
-def generate_credible_filter(credible_domains, max_sites=5):
+
+
+def domain_rotation(is_singapore_sources):
+    """Domains the site: filters rotate through and how many go into one query."""
+    return (SINGAPORE_DOMAIN, 4) if is_singapore_sources else (CREDIBLE_DOMAINS, 6)
+
+
+def build_query_plan(keywords, max_search_count, keyword_query_percentage, is_singapore_sources):
     """
-    Generates a query string filter using the 'site:' operator
-    from the first max_sites credible domains.
+    Generates every search query up front: the first uses all keywords, the
+    rest distinct keyword subsets, each with the next credible domains in the rotation.
     """
-    # Use only domains that don't start with a dot (full domains)
-    import random
-    sites = []
-    for i in range(max_sites):
-        sites.append(credible_domains[random.randrange(len(credible_domains))])
-
-    return " OR ".join([f"site:{site}" for site in sites])
+    domains, sites_per_query = domain_rotation(is_singapore_sources)
+    return plan_queries(keywords, max_search_count, keyword_query_percentage, domains, sites_per_query)
 
 
-@scrape_blueprint.route("/", methods=["POST"])
-def verify_keywords_with_sources():
-    data = request.get_json()
-    keywords = data.get("keywords", "")
-    original_query = data.get("original_query", "")
-    max_search_count = data.get("max_search_count", 20)
-    min_source_count = data.get("min_source_count", 25)
-    keyword_query_percentage = data.get("keyword_query_percentage", 0.8)
-    max_sites_in_query = data.get("max_sites_in_query", 5)
-    is_singapore_sources = data.get("is_singapore_sources", False)
+def search_credible_sources(query):
+    """Runs one search query and keeps the results from credible, non-PDF sources."""
+    results = [result for result in google_custom_search(query)
+               if result.get("url") and not result["url"].endswith(".pdf")]
+    tiers = domain_index.classify_urls([result["url"] for result in results])
+    return [
+        {"title": result.get("title", "No Title Found"), "url": result["url"], "reliability": 1, "tier": tier}
+        for result, tier in zip(results, tiers) if tier is not None
+    ]
 
 
+def find_sources(keywords, max_search_count=20, min_source_count=25, keyword_query_percentage=0.8,
+                 is_singapore_sources=False, max_in_flight=SEARCH_MAX_IN_FLIGHT):
+    """
+    Searches for credible sources and yields each new one as soon as its query
+    returns, until min_source_count are found, the plan runs out, or queries
+    stop finding new sources. Closing the generator cancels queries not yet started.
+    """
     if keyword_query_percentage > 1 or keyword_query_percentage < 0.2:
         keyword_query_percentage = 0.5
 
-    if not keywords:
-        return jsonify({"error": "No keywords provided"}), 400
-
-    # Combine keywords into a base search query
-    # Generate a credible filter from a subset of credible domains
-    # Append the filter to the query so only results from those domains are returned
+    queries = build_query_plan(keywords, max_search_count, keyword_query_percentage, is_singapore_sources)
 
-    verified_results = []
+    found = 0
     seen_urls = set()
+    # Stop early when queries stop finding new sources, but not before every domain was searched once
+    domains, sites_per_query = domain_rotation(is_singapore_sources)
+    yield_tracker = YieldTracker(SEARCH_YIELD_WINDOW, SEARCH_MIN_YIELD,
+                                 math.ceil(len(set(domains)) / sites_per_query))
 
-    pattern = r"(gov|edu|cia.gov|mothership\.sg|who\.int|who\.org|un\.org|europa\.eu|imf\.org|worldbank\.org|oecd\.org|edu\.sg|ac\.sg|moh\.gov\.sg|mom\.gov\.sg|mas\.gov\.sg|mha\.gov\.sg|nea\.gov\.sg|ica\.gov\.sg|singstat\.gov\.sg|police\.gov\.sg|straitstimes\.com|channelnewsasia\.com|todayonline\.com|zaobao\.com\.sg|businesstimes\.com\.sg|cdc\.gov|nih\.gov|fda\.gov|epa\.gov|ftc\.gov|consumer\.ftc\.gov|usa\.gov|bbc\.com|bbc\.co\.uk|reuters\.com|apnews\.com|theguardian\.com|nytimes\.com|washingtonpost\.com|cnn\.com|npr\.org|wsj\.com|bloomberg\.com|abcnews\.go\.com|cbsnews\.com|nbcnews\.com|latimes\.com|snopes\.com|factcheck\.org|politifact\.com|fullfact\.org|truthout\.org|sciencedirect\.com|nature\.com|sciencemag\.org|nationalgeographic\.com|newscientist\.com|malwarebytes\.com|kaspersky\.com|mcafee\.com|forbes\.com)"
-
-    counter = 0
-    while len({item['url'] for item in verified_results}) < min_source_count:
-        time.sleep(1)
-        if counter >= max_search_count:
-            break
-
-        counter += 1
-
-        try:
-            percentage = (random.uniform(keyword_query_percentage, 0.8))
-            if counter == 1:
-                random_keys = keywords
-            elif len(keywords) <= 10:
-                random_keys = random.choices(keywords, k=int(0.8 * (len(keywords) - 1)))
-            elif len(keywords) <= 20:
-                random_keys = random.choices(keywords, k=int(0.7 * (len(keywords) - 1)))
-            else:
-                random_keys = random.choices(keywords, k=int(percentage * (len(keywords) - 1)))
-
-            base_query = " ".join(random_keys)
-
-            if is_singapore_sources:
-                credible_filter = generate_credible_filter(SINGAPORE_DOMAIN, max_sites=4)
-            else:
-                credible_filter = generate_credible_filter(CREDIBLE_DOMAINS, max_sites=6)
-            search_query = f"{base_query} ({credible_filter} OR {credible_filter})"
-
-            print(f"query: {search_query}")
-            search_results = google_custom_search(search_query)
-            print(f"search number: {counter}\n"
+    # Queries run concurrently, at most max_in_flight at a time; results are merged as they arrive
+    executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="search")
+    try:
+        future_to_number = {
+            executor.submit(search_credible_sources, query): number for number, query in enumerate(queries, 1)
+        }
+        for future in as_completed(future_to_number):
+            try:
+                search_results = future.result()
+            except (requests.RequestException, RateLimitExceeded) as e:
+                print(f"search number {future_to_number[future]} failed: {e}")
+                continue
+            print(f"search number: {future_to_number[future]}\n"
                   f"{search_results}")
 
+            found_before = found
             for result in search_results:
-                url = result.get("url")
-                domain = get_domain(url)
-                match = re.search(pattern, url)
-
-                if url in seen_urls:
+                if result["url"] in seen_urls:
                     continue
+                seen_urls.add(result["url"])
+                found += 1
+                yield result
 
-                if url.endswith(".pdf"):
-                    continue
+            if found >= min_source_count:
+                break
+            if yield_tracker.record(found - found_before):
+                print(f"Stopping after {len(yield_tracker.yields)} searches: few new sources per query")
+                break
+    finally:
+        # Enough sources (or all done): drop queries that have not started yet
+        executor.shutdown(wait=False, cancel_futures=True)
 
-                seen_urls.add(url)
-                if match:
-                    if is_credible(domain) == 1:
-                        verified_results.append({
-                            "title": result.get("title", "No Title Found"),
-                            "url": url,
-                            "reliability": 1
-                        })
 
-        finally:
-            pass
+@scrape_blueprint.route("/", methods=["POST"])
+def verify_keywords_with_sources():
+    data = request.get_json()
+    keywords = data.get("keywords", "")
+    original_query = data.get("original_query", "")
+    max_search_count = data.get("max_search_count", 20)
+    min_source_count = data.get("min_source_count", 25)
+    keyword_query_percentage = data.get("keyword_query_percentage", 0.8)
+    max_sites_in_query = data.get("max_sites_in_query", 5)
+    is_singapore_sources = data.get("is_singapore_sources", False)
+    max_in_flight = data.get("max_in_flight", SEARCH_MAX_IN_FLIGHT)
+
+    if not keywords:
+        return jsonify({"error": "No keywords provided"}), 400
 
+    verified_results = list(find_sources(keywords, max_search_count, min_source_count, keyword_query_percentage,
+                                         is_singapore_sources, max_in_flight))
     return jsonify({"results": verified_results})
+
+
+@scrape_blueprint.route("/cache_stats", methods=["GET"])
+def search_cache_stats():
+    """Returns hit/miss counters of the search result cache."""
+    return jsonify(search_cache.get_stats())
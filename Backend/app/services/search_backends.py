@@ -0,0 +1,169 @@
+"""
+Search backends behind scraper.google_custom_search.
+
+    backend = get_search_backend()
+    results = backend.search("covid vaccine (site:gov.sg)", 5)  # [{"title", "url"}, ...]
+
+SEARCH_BACKEND selects the implementation:
+  - "google": the Custom Search JSON API. With SEARCH_RECORD_PATH set, every
+    result set is also written to a fixture file.
+  - "fixture": serves recorded result sets from SEARCH_FIXTURE_PATH with
+    simulated latency and injected errors. It makes no network calls, so
+    /scrape can be load-tested and benchmarked offline.
+
+Rate limiting, 429 backoff and caching are applied by google_custom_search
+around whichever backend is selected.
+"""
+import abc
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+
+from app.services.search_cache import normalize_query
+from app.utils.config import (
+    SEARCH_BACKEND, SEARCH_FIXTURE_PATH, SEARCH_FIXTURE_LATENCY_MS, SEARCH_FIXTURE_JITTER_MS,
+    SEARCH_FIXTURE_ERROR_RATE, SEARCH_FIXTURE_ERROR_STATUS, SEARCH_RECORD_PATH
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: recording is only serialized between threads
+    fcntl = None
+
+
+class SearchBackend(abc.ABC):
+    """Interface: search(query, num_results) returns a list of {"title", "url"} dicts."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def search(self, query, num_results=5):
+        """Result dicts for a query, at most num_results of them."""
+
+
+class GoogleSearchBackend(SearchBackend):
+    name = "google"
+    search_url = "https://www.googleapis.com/customsearch/v1"
+
+    def __init__(self, api_key=None, cse_id="50fd98dbe1984411d", record_path=SEARCH_RECORD_PATH):
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.cse_id = cse_id
+        self.record_path = record_path
+        self._record_lock = threading.Lock()
+
+    def search(self, query, num_results=5):
+        params = {
+            "key": self.api_key,
+            "cx": self.cse_id,
+            "q": query,
+            "num": 5,
+        }
+        response = requests.get(self.search_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        results = []
+        if "items" in data:
+            for item in data["items"]:
+                results.append({
+                    "title": item.get("title", "No Title"),
+                    "url": item.get("link", "")
+                })
+        if self.record_path:
+            self._record(query, results)
+        return results
+
+    def _record(self, query, results):
+        """
+        Adds a live result set to the fixture file. Worker processes recording
+        into one file take turns on a lock file, and each write goes to a temp
+        file swapped in with os.replace, so a crash never leaves half a file.
+        """
+        os.makedirs(os.path.dirname(self.record_path) or ".", exist_ok=True)
+        with self._record_lock, open(self.record_path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            fixtures = {"queries": {}, "fallback": []}
+            if os.path.exists(self.record_path):
+                with open(self.record_path, encoding="utf-8") as f:
+                    fixtures = json.load(f)
+            fixtures["queries"][normalize_query(query)] = results
+            if results:
+                fixtures["fallback"].append(results)
+            tmp = f"{self.record_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(fixtures, f, indent=1)
+            os.replace(tmp, self.record_path)
+
+
+class FixtureSearchBackend(SearchBackend):
+    """
+    Replays recorded result sets. A query recorded verbatim (after normalization)
+    gets its own results; any other query gets one of the fallback sets, chosen
+    by a hash of the query so the same query always sees the same results.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path=SEARCH_FIXTURE_PATH, latency_ms=SEARCH_FIXTURE_LATENCY_MS,
+                 jitter_ms=SEARCH_FIXTURE_JITTER_MS, error_rate=SEARCH_FIXTURE_ERROR_RATE,
+                 error_status=SEARCH_FIXTURE_ERROR_STATUS, seed=None):
+        with open(path, encoding="utf-8") as f:
+            fixtures = json.load(f)
+        self.queries = fixtures.get("queries", {})
+        self.fallback = fixtures.get("fallback", [])
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.calls = 0
+
+    def search(self, query, num_results=5):
+        with self._random_lock:
+            self.calls += 1
+            delay = max(self._random.gauss(self.latency, self.jitter), 0)
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+
+        if fail:
+            response = requests.Response()
+            response.status_code = self.error_status
+            response.url = "fixture://search"
+            raise requests.HTTPError(f"{self.error_status} injected fixture error", response=response)
+
+        key = normalize_query(query)
+        if key in self.queries:
+            results = self.queries[key]
+        elif self.fallback:
+            digest = int(hashlib.sha256(key.encode("utf-8")).hexdigest(), 16)
+            results = self.fallback[digest % len(self.fallback)]
+        else:
+            results = []
+        return [dict(result) for result in results[:num_results]]
+
+
+SEARCH_BACKENDS = {
+    "google": GoogleSearchBackend,
+    "fixture": FixtureSearchBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """Returns the process-wide backend selected by SEARCH_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if SEARCH_BACKEND not in SEARCH_BACKENDS:
+                raise ValueError(f"Unknown search backend '{SEARCH_BACKEND}'")
+            _backend = SEARCH_BACKENDS[SEARCH_BACKEND]()
+        return _backend
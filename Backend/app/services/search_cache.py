@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils.config import SEARCH_CACHE_PATH, SEARCH_CACHE_SIZE, SEARCH_CACHE_DISK_SIZE, SEARCH_CACHE_TTL_HOURS
+
+PRUNE_EVERY = 100  # disk writes between expiry/size sweeps
+
+
+def normalize_query(query):
+    """
+    Canonical form of a search query: the sorted keyword set plus the sorted
+    set of site: filters, so reordered or repeated keywords and sites match.
+    """
+    keywords, sites = set(), set()
+    for token in re.sub(r"[()]", " ", str(query)).split():
+        if token.lower().startswith("site:"):
+            sites.add(token[5:].lower())
+        elif token != "OR":
+            keywords.add(token.lower())
+    return " ".join(sorted(keywords)) + "|" + " ".join(sorted(sites))
+
+
+def query_key(query, num_results):
+    return hashlib.sha256(f"{normalize_query(query)}|{num_results}".encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """
+    TTL cache of search API results keyed by normalized query.
+
+    Like the embedding cache it has a bounded in-process LRU in front of a
+    sqlite file that survives restarts and is shared by all workers. Entries
+    older than ttl_hours are treated as misses; the disk tier is swept of
+    expired entries and trimmed to max_disk_entries every PRUNE_EVERY writes.
+    """
+
+    def __init__(self, path=SEARCH_CACHE_PATH, max_entries=SEARCH_CACHE_SIZE,
+                 max_disk_entries=SEARCH_CACHE_DISK_SIZE, ttl_hours=SEARCH_CACHE_TTL_HOURS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_hours * 3600
+        self._memory = OrderedDict()  # key -> (stored_at, results)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "writes": 0}
+
+        self._conn = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS searches (
+                        query_key TEXT PRIMARY KEY,
+                        results TEXT NOT NULL,
+                        stored_at REAL NOT NULL
+                    )
+                    """
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS searches_stored_at ON searches (stored_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Search cache disk tier disabled: {e}")
+                self._conn = None
+
+    def _remember(self, key, stored_at, results):
+        """Puts results in the LRU, evicting the least recently used entries. Caller holds the lock."""
+        self._memory[key] = (stored_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, query, num_results):
+        """Returns the cached result list for a query, or None if missing or expired."""
+        key = query_key(query, num_results)
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] >= cutoff:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+                self.stats["expired"] += 1
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT results, stored_at FROM searches WHERE query_key = ? AND stored_at >= ?",
+                        (key, cutoff)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Search cache read error: {e}")
+                    row = None
+                if row is not None:
+                    results = json.loads(row[0])
+                    self._remember(key, row[1], results)
+                    self.stats["disk_hits"] += 1
+                    return results
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, query, num_results, results):
+        """Stores the results of a successful search in both tiers."""
+        key = query_key(query, num_results)
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, stored_at, results)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO searches (query_key, results, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(results), stored_at)
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= PRUNE_EVERY:
+                    self._prune(stored_at)
+                self._conn.commit()
+                self.stats["writes"] += 1
+            except sqlite3.Error as e:
+                print(f"Search cache write error: {e}")
+
+    def _prune(self, now):
+        """Drops expired entries and the oldest ones beyond max_disk_entries. Caller holds the lock."""
+        self._writes_since_prune = 0
+        self._conn.execute("DELETE FROM searches WHERE stored_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM searches WHERE query_key IN ("
+            "SELECT query_key FROM searches ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def get_stats(self):
+        """Returns hit/miss counters plus the current LRU size."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["ttl_hours"] = self.ttl_seconds / 3600
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+search_cache = SearchCache()
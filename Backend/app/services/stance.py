@@ -0,0 +1,72 @@
+"""
+Batched sentiment / stance stage of the credibility scorer.
+
+The claim and every article passage go through the RoBERTa sentiment model
+in padded batches, and results are kept in the embedding cache so repeated
+articles are never re-inferred. This stage is optional and does not feed
+into the credibility score.
+"""
+import numpy as np
+
+from app.services.embedding_cache import embedding_cache
+from app.utils.config import SENTIMENT_BATCH_SIZE
+from app.utils.model_registry import get_model
+
+SENTIMENT_MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+SENTIMENT_LABELS = ["negative", "neutral", "positive"]
+
+
+def sentiment_vectors(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """
+    Returns an array of shape (len(texts), 3) with [prob_negative, prob_neutral, prob_positive]
+    per text. Uncached texts are run through the model in padded batches.
+    """
+    import torch
+    import torch.nn.functional as F
+
+    vectors = embedding_cache.get_many(SENTIMENT_MODEL_NAME, texts)
+    missing = list(dict.fromkeys(texts[i] for i, vector in enumerate(vectors) if vector is None))
+
+    if missing:
+        tokenizer, model = get_model("sentiment")
+        computed = []
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            # RoBERTa cannot take more than 512 tokens, so long passages are truncated
+            inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+            with torch.no_grad():
+                logits = model(**inputs).logits
+            computed.extend(F.softmax(logits, dim=-1).numpy())
+        embedding_cache.put_many(SENTIMENT_MODEL_NAME, missing, computed)
+
+        by_text = dict(zip(missing, computed))
+        vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+
+    return np.vstack(vectors) if vectors else np.zeros((0, len(SENTIMENT_LABELS)), dtype=np.float32)
+
+
+def stance_scores(claim, article_passages, batch_size=SENTIMENT_BATCH_SIZE):
+    """
+    Infers the claim once and all article passages in one batched pass.
+
+    article_passages is a list (one entry per article) of passage lists.
+    Returns (claim_sentiment, article_sentiments) where each article sentiment is the
+    mean distribution over its passages together with its cosine agreement with the claim.
+    """
+    flat = [claim] + [passage for passages in article_passages for passage in passages]
+    vectors = sentiment_vectors(flat, batch_size)
+    claim_vec = vectors[0]
+
+    article_sentiments = []
+    row = 1
+    for passages in article_passages:
+        article_vec = vectors[row:row + len(passages)].mean(axis=0)
+        row += len(passages)
+        agreement = float(np.dot(claim_vec, article_vec) /
+                          (np.linalg.norm(claim_vec) * np.linalg.norm(article_vec) or 1.0))
+        article_sentiments.append({
+            "sentiment": dict(zip(SENTIMENT_LABELS, article_vec.tolist())),
+            "agreement": agreement,
+        })
+
+    return dict(zip(SENTIMENT_LABELS, claim_vec.tolist())), article_sentiments
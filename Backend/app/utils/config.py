@@ -10,3 +10,149 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # You can load other env vars similarly:
 # OTHER_API_KEY = os.getenv("OTHER_API_KEY")
 # DB_PASSWORD = os.getenv("DB_PASSWORD")
+
+# Embedding settings
+# Number of texts handed to SentenceTransformer.encode per forward pass
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+# Directory for on-disk caches shared between worker processes
+CACHE_DIR = os.getenv(
+    "DIDDYEYE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache")
+)
+
+# Embedding cache: in-process LRU size and the sqlite file backing it
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "5000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+
+# Passage mode: embed only the top-k sentence windows of each article
+PASSAGE_MODE = os.getenv("PASSAGE_MODE", "false").lower() in ("1", "true", "yes")
+PASSAGE_TOP_K = int(os.getenv("PASSAGE_TOP_K", "3"))
+PASSAGE_WINDOW = int(os.getenv("PASSAGE_WINDOW", "3"))
+PASSAGE_POOLING = os.getenv("PASSAGE_POOLING", "max")  # "max" or "mean"
+
+# Scoring profile used when a request does not name one ("full", "balanced" or "fast")
+DEFAULT_SCORING_PROFILE = os.getenv("DEFAULT_SCORING_PROFILE", "full")
+# Once this many /embedding requests are in flight, new ones are scored with the "fast" profile (0 = never;
+# also never while "fast" is not marked calibrated in scoring_profiles)
+DEGRADE_INFLIGHT_THRESHOLD = int(os.getenv("DEGRADE_INFLIGHT_THRESHOLD", "0"))
+
+# Models loaded at server start (comma separated registry names); the rest load on first use
+PRELOAD_MODELS = [name.strip() for name in os.getenv("PRELOAD_MODELS", "").split(",") if name.strip()]
+
+# Sentiment / stance stage (optional, not part of the credibility score)
+SENTIMENT_ENABLED = os.getenv("SENTIMENT_ENABLED", "false").lower() in ("1", "true", "yes")
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+
+# Micro-batching of encode calls across concurrent requests
+EMBEDDING_BATCHER_ENABLED = os.getenv("EMBEDDING_BATCHER_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "256"))  # texts merged into one encode call
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "10"))  # how long a batch waits for more requests
+
+# Near-duplicate claim lookup over QueryData history
+CLAIM_LOOKUP_THRESHOLD = float(os.getenv("CLAIM_LOOKUP_THRESHOLD", "0.92"))  # cosine similarity on MiniLM-L12
+CLAIM_LOOKUP_MAX_AGE_HOURS = float(os.getenv("CLAIM_LOOKUP_MAX_AGE_HOURS", "24"))  # freshness window
+
+# Memory-mapped ANN index over claim embeddings, shared by all workers on the host
+CLAIM_INDEX_PATH = os.getenv("CLAIM_INDEX_PATH", os.path.join(CACHE_DIR, "claim_index"))
+CLAIM_INDEX_DTYPE = os.getenv("CLAIM_INDEX_DTYPE", "float32")  # or "float16" to halve the file
+CLAIM_INDEX_COMPACT_TAIL = int(os.getenv("CLAIM_INDEX_COMPACT_TAIL", "50000"))  # unclustered rows before compacting
+CLAIM_INDEX_RETENTION_HOURS = float(os.getenv("CLAIM_INDEX_RETENTION_HOURS", "0"))  # 0 keeps every claim
+# How often QueryData rows that bypassed this host's index (other hosts, other index paths) are pulled in
+CLAIM_INDEX_REFRESH_SECONDS = float(os.getenv("CLAIM_INDEX_REFRESH_SECONDS", "60"))
+
+# Storage dtype of QueryData.input_embedding blobs: "float32", "float16" or "int8"
+QUERY_EMBEDDING_DTYPE = os.getenv("QUERY_EMBEDDING_DTYPE", "float32")
+
+# Database: "mysql" in production, "sqlite" for local runs and tests
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = int(os.getenv("DB_PORT", "3306"))
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "Borahe13")
+DB_NAME = os.getenv("DB_NAME", "VERIFAI")
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(CACHE_DIR, "verifai.sqlite3"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # connections shared by all request threads
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # seconds to wait for a free connection
+DB_HEALTHCHECK_SECONDS = float(os.getenv("DB_HEALTHCHECK_SECONDS", "30"))  # ping connections idle longer than this
+
+# Write-behind query logging: rows are flushed every QUERY_LOG_BATCH_SIZE rows or QUERY_LOG_FLUSH_MS
+QUERY_LOG_BATCH_SIZE = int(os.getenv("QUERY_LOG_BATCH_SIZE", "50"))
+QUERY_LOG_FLUSH_MS = float(os.getenv("QUERY_LOG_FLUSH_MS", "500"))
+QUERY_LOG_QUEUE_SIZE = int(os.getenv("QUERY_LOG_QUEUE_SIZE", "10000"))
+QUERY_LOG_FULL_POLICY = os.getenv("QUERY_LOG_FULL_POLICY", "drop")  # "drop" or "block" when the queue is full
+QUERY_LOG_BLOCK_TIMEOUT = float(os.getenv("QUERY_LOG_BLOCK_TIMEOUT", "1"))  # max seconds "block" waits
+
+# Max search API queries the /scrape source finder keeps in flight at once
+SEARCH_MAX_IN_FLIGHT = int(os.getenv("SEARCH_MAX_IN_FLIGHT", "4"))
+
+# Outbound API rate limits as "requests_per_second,burst,daily_quota" (daily_quota 0 = unlimited)
+RATE_LIMITS = {
+    "google_search": os.getenv("RATE_LIMIT_GOOGLE_SEARCH", "10,10,10000"),
+    "aiornot": os.getenv("RATE_LIMIT_AIORNOT", "1,2,0"),
+    "openai": os.getenv("RATE_LIMIT_OPENAI", "5,10,0"),
+}
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "false").lower() in ("1", "true", "yes")  # share buckets across processes
+RATE_LIMIT_STATE_DIR = os.getenv("RATE_LIMIT_STATE_DIR", os.path.join(CACHE_DIR, "rate_limits"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))  # retries after a 429 response
+
+# Cache of search API results keyed by normalized query (keyword set + site filter)
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "24"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2000"))  # in-memory entries
+SEARCH_CACHE_DISK_SIZE = int(os.getenv("SEARCH_CACHE_DISK_SIZE", "100000"))  # entries kept on disk
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join(CACHE_DIR, "search_cache.sqlite3"))
+# Stop searching once the last SEARCH_YIELD_WINDOW queries averaged fewer than SEARCH_MIN_YIELD new URLs
+SEARCH_YIELD_WINDOW = int(os.getenv("SEARCH_YIELD_WINDOW", "4"))
+SEARCH_MIN_YIELD = float(os.getenv("SEARCH_MIN_YIELD", "0.5"))
+
+# Credible source domains, their tiers and the site: filter rotations
+DOMAIN_INDEX_PATH = os.getenv(
+    "DOMAIN_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "credible_domains.json")
+)
+
+# Search backend behind google_custom_search: "google" (live API) or "fixture" (recorded results, offline)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "google")
+SEARCH_FIXTURE_PATH = os.getenv(
+    "SEARCH_FIXTURE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                 "benchmarks", "data", "search_fixtures.json")
+)
+SEARCH_FIXTURE_LATENCY_MS = float(os.getenv("SEARCH_FIXTURE_LATENCY_MS", "300"))  # mean simulated API latency
+SEARCH_FIXTURE_JITTER_MS = float(os.getenv("SEARCH_FIXTURE_JITTER_MS", "100"))
+SEARCH_FIXTURE_ERROR_RATE = float(os.getenv("SEARCH_FIXTURE_ERROR_RATE", "0"))  # share of calls failing
+SEARCH_FIXTURE_ERROR_STATUS = int(os.getenv("SEARCH_FIXTURE_ERROR_STATUS", "503"))  # e.g. 429 to exercise backoff
+SEARCH_RECORD_PATH = os.getenv("SEARCH_RECORD_PATH", "")  # if set, live results are recorded here as fixtures
+
+# Streamed /pipeline: threads fetching article pages and scoring fetched articles
+PIPELINE_FETCH_WORKERS = int(os.getenv("PIPELINE_FETCH_WORKERS", "8"))
+PIPELINE_SCORE_WORKERS = int(os.getenv("PIPELINE_SCORE_WORKERS", "4"))
+
+# Shared keep-alive HTTP fetcher for article pages
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "32"))  # page fetches in flight per process
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "4"))  # concurrent fetches (and pooled connections) per host
+FETCH_POOL_HOSTS = int(os.getenv("FETCH_POOL_HOSTS", "64"))  # hosts whose connection pools are kept alive
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "3.05"))
+FETCH_READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", "10"))
+FETCH_USER_AGENT = os.getenv("FETCH_USER_AGENT", "Mozilla/5.0 (compatible; DiddyEye/1.0)")
+
+# Article fetch engine for /scrape_content and /pipeline: "async" (httpx on an event loop) or "threads"
+FETCH_ENGINE = os.getenv("FETCH_ENGINE", "async")
+FETCH_ASYNC_MAX_CONNECTIONS = int(os.getenv("FETCH_ASYNC_MAX_CONNECTIONS", "200"))  # concurrent fetches on the loop
+FETCH_REQUEST_DEADLINE = float(os.getenv("FETCH_REQUEST_DEADLINE", "12"))  # seconds for one page, body included
+FETCH_BATCH_DEADLINE = float(os.getenv("FETCH_BATCH_DEADLINE", "20"))  # /scrape_content cancels stragglers after this
+FETCH_PARSE_POOL = os.getenv("FETCH_PARSE_POOL", "process")  # "process" or "thread" pool for HTML/PDF parsing
+FETCH_PARSE_WORKERS = int(os.getenv("FETCH_PARSE_WORKERS", str(os.cpu_count() or 2)))
+
+# On-disk cache of fetched article pages and their extracted text, revalidated with ETag/Last-Modified
+ARTICLE_CACHE_PATH = os.getenv("ARTICLE_CACHE_PATH", os.path.join(CACHE_DIR, "article_cache.sqlite3"))  # "" disables
+ARTICLE_CACHE_MAX_MB = float(os.getenv("ARTICLE_CACHE_MAX_MB", "512"))  # least recently used pages are evicted beyond this
+ARTICLE_CACHE_DEFAULT_TTL = float(os.getenv("ARTICLE_CACHE_DEFAULT_TTL", "3600"))  # seconds fresh without Cache-Control/Expires
+
+# HTML main-content extractor: "lxml" (single pass, text-density scoring) or "soup" (BeautifulSoup selector list)
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "lxml")
+
+# Learned per-domain extraction rules (selector of the block that held the article text)
+EXTRACTION_RULES_PATH = os.getenv("EXTRACTION_RULES_PATH", os.path.join(CACHE_DIR, "extraction_rules.sqlite3"))  # "" keeps them in memory
+EXTRACTION_RULE_MIN_HITS = int(os.getenv("EXTRACTION_RULE_MIN_HITS", "2"))  # pages agreeing before a rule is used
+EXTRACTION_RULE_MAX_MISSES = int(os.getenv("EXTRACTION_RULE_MAX_MISSES", "3"))  # consecutive failures before relearning
@@ -0,0 +1,120 @@
+"""
+Process-wide registry of ML models.
+
+Every module asks the registry for a model by name instead of loading its
+own copy at import time. A model is loaded once, on first use (or at startup
+when it is listed in PRELOAD_MODELS), and the same instance is shared by all
+callers in the process.
+"""
+import os
+import threading
+import time
+
+from app.utils.config import PRELOAD_MODELS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_loaders = {}
+_models = {}
+_stats = {}
+_lock = threading.Lock()
+_load_locks = {}
+
+
+def _process_rss():
+    """Resident memory of this process in bytes, or None without psutil."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        return None
+
+
+def _weight_bytes(model):
+    """Size of the model's weights in bytes, for torch and keras models."""
+    if isinstance(model, tuple):
+        return sum(_weight_bytes(part) for part in model)
+    if hasattr(model, "parameters") and hasattr(model, "buffers"):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if hasattr(model, "weights") and hasattr(model, "count_params"):
+        return sum(int(w.numpy().nbytes) for w in model.weights)
+    return 0
+
+
+def register_model(name, loader):
+    """Registers a zero-argument loader function under name."""
+    with _lock:
+        _loaders[name] = loader
+        _load_locks.setdefault(name, threading.Lock())
+
+
+def get_model(name):
+    """Returns the model registered under name, loading it on first use."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _lock:
+        if name not in _loaders:
+            raise KeyError(f"No model registered under '{name}'")
+        load_lock = _load_locks[name]
+
+    # Loading happens outside the registry lock so different models can load in parallel
+    with load_lock:
+        if name not in _models:
+            rss_before = _process_rss()
+            start = time.perf_counter()
+            model = _loaders[name]()
+            load_seconds = time.perf_counter() - start
+            rss_after = _process_rss()
+
+            _stats[name] = {
+                "load_seconds": round(load_seconds, 3),
+                "weight_bytes": _weight_bytes(model),
+                "rss_delta_bytes": (rss_after - rss_before) if rss_before is not None else None,
+            }
+            _models[name] = model
+            print(f"Loaded model '{name}' in {load_seconds:.1f}s")
+    return _models[name]
+
+
+def preload(names=None):
+    """Loads the given models (default: PRELOAD_MODELS) up front, e.g. at server start."""
+    for name in (PRELOAD_MODELS if names is None else names):
+        get_model(name)
+
+
+def memory_report():
+    """Registered models, whether they are loaded, and how much memory each one uses."""
+    return {
+        name: dict(_stats.get(name, {}), loaded=name in _models)
+        for name in sorted(_loaders)
+    }
+
+
+def _sentence_transformer_loader(model_name):
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    return load
+
+
+def _sentiment_loader():
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    modelname = "cardiffnlp/twitter-roberta-base-sentiment"
+    tokenizer = AutoTokenizer.from_pretrained(modelname)
+    model = AutoModelForSequenceClassification.from_pretrained(modelname)
+    model.eval()
+    return tokenizer, model
+
+
+def _ai_image_loader():
+    from tensorflow.keras.models import load_model
+    return load_model(os.path.join(BACKEND_DIR, "MobileNetV2_finetuned_model(0.95 loss 0.11).keras"))
+
+
+for _name in ["all-MiniLM-L12-v2", "all-mpnet-base-v2", "paraphrase-mpnet-base-v2", "all-MiniLM-L6-v2"]:
+    register_model(_name, _sentence_transformer_loader(_name))
+register_model("sentiment", _sentiment_loader)  # (tokenizer, model) pair
+register_model("ai_image_detector", _ai_image_loader)
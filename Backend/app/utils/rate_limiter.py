@@ -0,0 +1,204 @@
+"""
+Token-bucket rate limiting for outbound API calls (Google search, AIorNOT, OpenAI).
+
+    response = call_with_backoff("google_search", requests.get, url, params=params)
+
+Each API has a bucket that refills at RATE_LIMITS[name] requests per second up
+to its burst size, plus an optional daily quota. Every thread in the process
+shares the bucket; with RATE_LIMIT_SHARED the bucket state lives in a small
+file under RATE_LIMIT_STATE_DIR, locked with flock, so all workers on the host
+draw from the same budget. A 429 response empties the bucket and pauses the
+API for the server's Retry-After (or an exponential backoff) before retrying.
+Callers can name other transient failures (retry_on exception types,
+retry_statuses codes); those are retried after the same backoff without
+pausing the API for everyone.
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from app.utils.config import RATE_LIMITS, RATE_LIMIT_SHARED, RATE_LIMIT_STATE_DIR, RATE_LIMIT_MAX_RETRIES
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only shared between threads
+    fcntl = None
+
+
+class RateLimitExceeded(Exception):
+    """The daily quota is used up, or no token became free within the wait limit."""
+
+
+class TokenBucket:
+    def __init__(self, name, rate, burst, daily_quota=0, state_path=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._local_state = None
+        self._waited_seconds = 0.0
+        self._throttled = 0
+
+    def _fresh_state(self, now):
+        return {"tokens": float(self.burst), "updated": now, "day": date.today().isoformat(),
+                "used_today": 0, "backoff_until": 0.0}
+
+    @contextmanager
+    def _state(self):
+        """Yields the bucket state for a read-modify-write, shared through a file if configured."""
+        with self._lock:
+            if self.state_path is None:
+                if self._local_state is None:
+                    self._local_state = self._fresh_state(time.time())
+                yield self._local_state
+                return
+
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, "a+") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+                handle.seek(0)
+                try:
+                    state = json.loads(handle.read())
+                except ValueError:
+                    state = self._fresh_state(time.time())
+                yield state
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+                handle.flush()
+
+    def _refill(self, state, now):
+        today = date.today().isoformat()
+        if state["day"] != today:
+            state["day"], state["used_today"] = today, 0
+        elapsed = max(now - state["updated"], 0)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+        state["updated"] = now
+
+    def acquire(self, timeout=None):
+        """Blocks until a request may be sent. Raises RateLimitExceeded on quota or timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._state() as state:
+                now = time.time()
+                self._refill(state, now)
+                if self.daily_quota and state["used_today"] >= self.daily_quota:
+                    raise RateLimitExceeded(f"{self.name}: daily quota of {self.daily_quota} used up")
+                wait = state["backoff_until"] - now
+                if wait <= 0:
+                    if state["tokens"] >= 1:
+                        state["tokens"] -= 1
+                        state["used_today"] += 1
+                        return
+                    wait = (1 - state["tokens"]) / self.rate
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(f"{self.name}: no request slot within {timeout}s")
+            self._throttled += 1
+            self._waited_seconds += wait
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """Pauses the API for seconds (after a 429) and drops the tokens saved up meanwhile."""
+        with self._state() as state:
+            now = time.time()
+            state["backoff_until"] = max(state["backoff_until"], now + seconds)
+            state["tokens"] = 0.0
+            state["updated"] = now
+
+    def utilization(self):
+        """Current bucket level, daily quota use and time spent waiting for tokens."""
+        with self._state() as state:
+            now = time.time()
+            self._refill(state, now)
+            return {
+                "requests_per_second": self.rate,
+                "burst": self.burst,
+                "tokens_available": round(state["tokens"], 2),
+                "used_today": state["used_today"],
+                "daily_quota": self.daily_quota or None,
+                "quota_utilization": state["used_today"] / self.daily_quota if self.daily_quota else None,
+                "backoff_seconds": round(max(state["backoff_until"] - now, 0), 2),
+                "throttled_calls": self._throttled,
+                "waited_seconds": round(self._waited_seconds, 2),
+                "shared": self.state_path is not None,
+            }
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_limiter(name):
+    """Returns the process-wide bucket for an API listed in RATE_LIMITS."""
+    with _buckets_lock:
+        if name not in _buckets:
+            rate, burst, daily_quota = RATE_LIMITS[name].split(",")
+            state_path = os.path.join(RATE_LIMIT_STATE_DIR, f"{name}.json") if RATE_LIMIT_SHARED else None
+            _buckets[name] = TokenBucket(name, float(rate), int(burst), int(daily_quota), state_path)
+        return _buckets[name]
+
+
+def _status_and_headers(outcome):
+    """Status code and headers of a requests/httpx response, or of the response attached to an error."""
+    response = outcome if hasattr(outcome, "status_code") and hasattr(outcome, "headers") \
+        else getattr(outcome, "response", None)
+    if response is None:
+        return getattr(outcome, "status_code", None), {}
+    return getattr(response, "status_code", None), getattr(response, "headers", None) or {}
+
+
+def _retry_delay(headers, attempt):
+    retry_after = headers.get("Retry-After")
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        return (2 ** attempt) + random.uniform(0, 1)
+
+
+def call_with_backoff(name, fn, *args, max_retries=RATE_LIMIT_MAX_RETRIES, retry_on=(), retry_statuses=(),
+                      **kwargs):
+    """
+    Calls fn(*args, **kwargs) once the API's bucket allows it, retrying after
+    429 responses (returned or raised) up to max_retries times. Errors of the
+    retry_on types and responses with retry_statuses codes are retried too.
+    """
+    limiter = get_limiter(name)
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            status, headers = _status_and_headers(e)
+            transient = isinstance(e, retry_on) or status in retry_statuses
+            failure = status or type(e).__name__
+            if (status != 429 and not transient) or attempt == max_retries:
+                raise
+        else:
+            status, headers = _status_and_headers(result)
+            transient, failure = status in retry_statuses, status
+            if (status != 429 and not transient) or attempt == max_retries:
+                return result
+
+        delay = _retry_delay(headers, attempt)
+        if status == 429:
+            print(f"{name}: rate limited (429), backing off {delay:.1f}s")
+            limiter.penalize(delay)
+        else:
+            # Only this call failed; the bucket stays open for other callers
+            print(f"{name}: transient error ({failure}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def utilization_report():
+    """Utilization of every API bucket used so far in this process."""
+    with _buckets_lock:
+        buckets = dict(_buckets)
+    return {name: bucket.utilization() for name, bucket in buckets.items()}
@@ -0,0 +1,111 @@
+"""
+Speed and output of the lxml single-pass extractor against the BeautifulSoup
+extractor on a corpus of saved pages, plus the lxml extractor once a
+per-domain rule has been learned for the page ("rule ms").
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_extractor --repeat 20
+
+The corpus is benchmarks/data/pages (or --pages): saved .html files plus a
+manifest.json giving each page's Content-Type and phrases its main text must
+and must not contain. Add a page by saving it there and listing it in the
+manifest. Texts are compared with whitespace removed, since the BeautifulSoup
+extractor joins strings without separators.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+
+def squash(text):
+    return re.sub(r"\s+", "", text or "").lower()
+
+
+def shingles(text, size=8):
+    text = squash(text)
+    return {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+
+
+def overlap(a, b):
+    """Jaccard similarity of two texts' character shingles."""
+    a, b = shingles(a), shingles(b)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def check(text, spec):
+    """Number of manifest expectations a text meets, out of how many."""
+    text = squash(text)
+    met = sum(squash(phrase) in text for phrase in spec.get("must_contain", []))
+    met += sum(squash(phrase) not in text for phrase in spec.get("must_not_contain", []))
+    return met, len(spec.get("must_contain", [])) + len(spec.get("must_not_contain", []))
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML main-content extractors")
+    parser.add_argument("--pages", default=os.path.join(os.path.dirname(__file__), "data", "pages"))
+    parser.add_argument("--repeat", type=int, default=10, help="extractions per page and extractor")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.services import html_extractor
+    from app.services.page_parser import soup_extract, declared_encoding
+    from app.services.extraction_rules import ExtractionRules
+
+    rules = ExtractionRules(path="")  # in memory, so runs do not share learned rules
+
+    with open(os.path.join(args.pages, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    totals = {"soup": [0.0, 0, 0], "lxml": [0.0, 0, 0], "rule": [0.0, 0, 0]}  # seconds, expectations met, expectations
+    print(f"{'page':28} {'KB':>5} {'soup ms':>8} {'lxml ms':>8} {'rule ms':>8} {'speedup':>7} "
+          f"{'soup ok':>7} {'lxml ok':>7} {'overlap':>7}")
+
+    # soup_extract prints on every success
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    rows = []
+    try:
+        for name, spec in sorted(manifest.items()):
+            with open(os.path.join(args.pages, name), "rb") as f:
+                body = f.read()
+            encoding = declared_encoding(spec.get("content_type", "text/html"))
+            soup_time, soup_text = timed(lambda: soup_extract(body, encoding), args.repeat)
+            lxml_time, lxml_text = timed(lambda: html_extractor.extract(body, encoding), args.repeat)
+            url = f"https://{name}/"  # one domain per page
+            for _ in range(rules.min_hits):
+                rules.extract(url, body, encoding)
+            rule_time, rule_text = timed(lambda: rules.extract(url, body, encoding), args.repeat)
+            rows.append((name, len(body), soup_time, lxml_time, rule_time, check(soup_text, spec),
+                         check(lxml_text, spec), check(rule_text, spec), overlap(soup_text, lxml_text)))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    for name, size, soup_time, lxml_time, rule_time, soup_ok, lxml_ok, rule_ok, similarity in rows:
+        for key, seconds, ok in (("soup", soup_time, soup_ok), ("lxml", lxml_time, lxml_ok),
+                                 ("rule", rule_time, rule_ok)):
+            totals[key][0] += seconds
+            totals[key][1] += ok[0]
+            totals[key][2] += ok[1]
+        print(f"{name[:28]:28} {size / 1024:5.0f} {soup_time * 1000:8.1f} {lxml_time * 1000:8.1f} {rule_time * 1000:8.1f} "
+              f"{soup_time / lxml_time:6.1f}x {soup_ok[0]:>3}/{soup_ok[1]:<3} {lxml_ok[0]:>3}/{lxml_ok[1]:<3} "
+              f"{similarity:7.2f}")
+
+    soup, lxml, rule = totals["soup"], totals["lxml"], totals["rule"]
+    print(f"total: soup {soup[0] * 1000:.1f} ms, lxml {lxml[0] * 1000:.1f} ms ({soup[0] / lxml[0]:.1f}x), "
+          f"with learned rules {rule[0] * 1000:.1f} ms ({soup[0] / rule[0]:.1f}x); "
+          f"expectations met: soup {soup[1]}/{soup[2]}, lxml {lxml[1]}/{lxml[2]}, rules {rule[1]}/{rule[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Latency and score agreement of each scoring profile against the full ensemble.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_scoring_profiles --data benchmarks/data/scoring_sample.json
+
+The data file is a list of /embedding payloads ({"input_text", "article_info"}).
+The embedding cache is disabled unless --with-cache is passed, so every run
+measures real encoding work.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def verdict(score):
+    """Same buckets the bot uses in reliability_check."""
+    if score > 0.60:
+        return "reliable"
+    if score > 0.55:
+        return "ambiguous"
+    return "unreliable"
+
+
+def rank_correlation(a, b):
+    """Spearman rank correlation of two equally long score lists."""
+    if len(a) < 2:
+        return 1.0
+    rank_a = {i: r for r, i in enumerate(sorted(range(len(a)), key=lambda i: a[i]))}
+    rank_b = {i: r for r, i in enumerate(sorted(range(len(b)), key=lambda i: b[i]))}
+    n = len(a)
+    d2 = sum((rank_a[i] - rank_b[i]) ** 2 for i in range(n))
+    return 1 - 6 * d2 / (n * (n * n - 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /embedding scoring profiles")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(__file__), "data", "scoring_sample.json"))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per claim")
+    parser.add_argument("--with-cache", action="store_true", help="keep the embedding cache enabled")
+    args = parser.parse_args()
+
+    if not args.with_cache:
+        os.environ["EMBEDDING_CACHE_PATH"] = ""
+        os.environ["EMBEDDING_CACHE_SIZE"] = "0"
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.services.embedding import score_articles
+    from app.services.scoring_profiles import SCORING_PROFILES
+
+    with open(args.data) as f:
+        payloads = json.load(f)
+
+    results = {}
+    for name, profile in SCORING_PROFILES.items():
+        # Warm-up run loads the profile's models outside the timed section
+        score_articles(payloads[0]["input_text"], payloads[0]["article_info"], profile)
+
+        timings = []
+        scores = []
+        for payload in payloads:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                similarities, _vecs, _sentiment = score_articles(payload["input_text"], payload["article_info"], profile)
+                timings.append(time.perf_counter() - start)
+            scores.append(similarities)
+        timings.sort()
+        results[name] = {"timings": timings, "scores": scores}
+
+    full = results["full"]["scores"]
+    full_median = results["full"]["timings"][len(results["full"]["timings"]) // 2]
+    print(f"{'profile':<10} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8} {'mean |d|':>9} "
+          f"{'rank corr':>9} {'top url':>8} {'verdict':>8}")
+    for name, result in results.items():
+        timings = result["timings"]
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+        diffs, corrs, top_same, verdict_same = [], [], 0, 0
+        for base, other in zip(full, result["scores"]):
+            base_scores = [s[0] for s in base]
+            other_scores = [s[0] for s in other]
+            diffs.extend(abs(x - y) for x, y in zip(base_scores, other_scores))
+            corrs.append(rank_correlation(base_scores, other_scores))
+            if base and other:
+                top_same += max(base)[1] == max(other)[1]
+                verdict_same += verdict(max(base_scores)) == verdict(max(other_scores))
+
+        n = len(full)
+        print(f"{name:<10} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {full_median / p50:>7.2f}x "
+              f"{sum(diffs) / max(len(diffs), 1):>9.3f} {sum(corrs) / max(len(corrs), 1):>9.3f} "
+              f"{top_same / n:>8.0%} {verdict_same / n:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
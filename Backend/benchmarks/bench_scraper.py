@@ -0,0 +1,106 @@
+"""
+Throughput and latency of the /scrape source-finding stage against the offline
+fixture search backend. No search API quota is used.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_scraper --latency-ms 300 --concurrency 4 --repeat 3
+
+The data file is a list of /scrape payloads. Search results come from
+benchmarks/data/search_fixtures.json (or --fixtures); record real ones by
+running the service with SEARCH_RECORD_PATH set. The search cache is disabled
+unless --with-cache is passed, so every query pays the simulated API latency.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    data_dir = os.path.join(os.path.dirname(__file__), "data")
+    parser = argparse.ArgumentParser(description="Benchmark the /scrape source finder offline")
+    parser.add_argument("--data", default=os.path.join(data_dir, "scrape_sample.json"))
+    parser.add_argument("--fixtures", default=os.path.join(data_dir, "search_fixtures.json"))
+    parser.add_argument("--latency-ms", type=float, default=300, help="mean simulated search latency")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of searches that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="status of injected failures (429 exercises backoff)")
+    parser.add_argument("--concurrency", type=int, default=1, help="/scrape requests run at once")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the data file")
+    parser.add_argument("--with-cache", action="store_true", help="keep the search cache enabled")
+    parser.add_argument("--no-rate-limit", action="store_true", help="lift the google_search token bucket")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "SEARCH_BACKEND": "fixture",
+        "SEARCH_FIXTURE_PATH": args.fixtures,
+        "SEARCH_FIXTURE_LATENCY_MS": str(args.latency_ms),
+        "SEARCH_FIXTURE_JITTER_MS": str(args.jitter_ms),
+        "SEARCH_FIXTURE_ERROR_RATE": str(args.error_rate),
+        "SEARCH_FIXTURE_ERROR_STATUS": str(args.error_status),
+    })
+    if not args.with_cache:
+        os.environ["SEARCH_CACHE_PATH"] = ""
+        os.environ["SEARCH_CACHE_SIZE"] = "0"
+    if args.no_rate_limit:
+        os.environ["RATE_LIMIT_GOOGLE_SEARCH"] = "100000,100000,0"
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from flask import Flask
+    from app.services.scraper import scrape_blueprint
+    from app.services.search_backends import get_search_backend
+
+    app = Flask(__name__)
+    app.register_blueprint(scrape_blueprint, url_prefix="/scrape")
+    backend = get_search_backend()
+
+    with open(args.data) as f:
+        payloads = json.load(f) * args.repeat
+
+    timings, sources, failures = [], [], 0
+    lock = threading.Lock()
+
+    def run(payload):
+        nonlocal failures
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post("/scrape/", json=payload)
+        elapsed = time.perf_counter() - start
+        with lock:
+            if response.status_code != 200:
+                failures += 1
+                return
+            timings.append(elapsed)
+            sources.append(len(response.get_json()["results"]))
+
+    # Printing every query would dominate the timings
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(run, payloads))
+        wall = time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print(f"requests: {len(payloads)} (failed {failures}), concurrency {args.concurrency}, "
+          f"search latency {args.latency_ms:.0f}+/-{args.jitter_ms:.0f} ms, error rate {args.error_rate:.0%}")
+    if timings:
+        print(f"latency p50 {percentile(timings, 0.5) * 1000:.0f} ms, p95 {percentile(timings, 0.95) * 1000:.0f} ms, "
+              f"throughput {len(timings) / wall:.2f} req/s")
+        print(f"searches per request {backend.calls / len(payloads):.1f}, "
+              f"sources per request {sum(sources) / len(sources):.1f}")
+
+
+if __name__ == "__main__":
+    main()
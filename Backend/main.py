@@ -8,21 +8,27 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Add the parent directory to Python's module search path
 sys.path.append(parent_dir)
 
-# Now your import will work
-from TelegramBot.bot import start_bot
+# Flask, the blueprints, their models and the bot are imported in create_app and under __main__ only:
+# spawned parse pool workers re-run this module as __mp_main__ and must not load them
 
-# Rest of your imports and code...
 
-from flask import Flask
-from app.services.tf_idf import verify_blueprint
-from app.services.scraper import scrape_blueprint
+def create_app():
+    from flask import Flask, jsonify
 
-from app.services.content_scraper import scrape_content_blueprint
-from app.services.embedding import embedding_blueprint
-from app.services.explanation import explanation_blueprint
+    from app.services.tf_idf import verify_blueprint
+    from app.services.scraper import scrape_blueprint
 
+    from app.services.content_scraper import scrape_content_blueprint
+    from app.services.embedding import embedding_blueprint
+    from app.services.explanation import explanation_blueprint
+    from app.services.claim_lookup import claim_lookup_blueprint
+    from app.services.pipeline import pipeline_blueprint
+    from app.services.claim_history import claim_history
+    from app.database.sql import DatabaseAccess
+    from app.services.async_fetcher import async_fetch_engine
+    from app.utils import model_registry, rate_limiter
+    from app.utils.config import FETCH_ENGINE
 
-def create_app():
     app = Flask(__name__)
     #test
     # Register your blueprint for the /verify endpoint
@@ -32,6 +38,28 @@ def create_app():
     # (Optional) configure app settings, load env, etc.
     app.register_blueprint(embedding_blueprint, url_prefix="/embedding")
     app.register_blueprint(explanation_blueprint, url_prefix="/explanation")
+    app.register_blueprint(claim_lookup_blueprint, url_prefix="/lookup")
+    app.register_blueprint(pipeline_blueprint, url_prefix="/pipeline")
+
+    @app.route("/models", methods=["GET"])
+    def models_status():
+        """Loaded models and their memory use."""
+        return jsonify(model_registry.memory_report())
+
+    @app.route("/rate_limits", methods=["GET"])
+    def rate_limits_status():
+        """Token bucket levels and quota use of the outbound APIs."""
+        return jsonify(rate_limiter.utilization_report())
+
+    # Production lists its models in PRELOAD_MODELS; dev and tests load lazily
+    model_registry.preload()
+    # Backfill and refresh of the claim history index run in the background
+    claim_history.start()
+    # Binary embeddings only once QueryData.input_embedding is a BLOB column (see migrate_embeddings)
+    DatabaseAccess().binary_embeddings()
+    if FETCH_ENGINE == "async":
+        # Event loop, HTTP client and parse workers come up before the first /scrape_content
+        async_fetch_engine.start()
     return app
 
 if __name__ == "__main__":
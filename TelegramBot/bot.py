@@ -10,6 +10,7 @@ import time
 from Backend.app.controllers.model import reliability_model
 from Backend.app.controllers.AICheckModel import aiChecker_model
 from Backend.app.controllers.heatmap_model import heatmap_creator
+from app.utils.model_registry import get_model
 
 load_dotenv()
 
@@ -23,13 +24,6 @@ min_source_count = 40
 keyword_query_percentage = 0.6
 max_sites_in_query = 4
 is_singapore_sources = True
-from tensorflow.keras.models import load_model
-
-# Fix model loading with absolute path
-script_dir = os.path.dirname(os.path.abspath(__file__))
-root_dir = os.path.dirname(script_dir)  # Get the parent directory
-model_path = os.path.join(root_dir, 'Backend', 'MobileNetV2_finetuned_model(0.95 loss 0.11).keras')
-model = load_model(model_path)
 
 # This dictionary will store each user's current "mode"
 # e.g. user_mode[chat_id] = "reliability" or "ai" or None
@@ -57,7 +51,7 @@ def call_model(message, user_text, isReliability=True):
             try:
                 processing_msg = bot.send_message(message.chat.id, "Generating heatmap visualization... Please wait.")
 
-                heatmap_path = heatmap_creator(user_text, model)  # heatmap generation
+                heatmap_path = heatmap_creator(user_text, get_model("ai_image_detector"))  # heatmap generation
 
                 with open(heatmap_path, 'rb') as heatmap_img:
                     bot.send_photo(message.chat.id, heatmap_img,